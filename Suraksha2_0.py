@@ -1,46 +1,27 @@
 import streamlit as st
 import os
-import shutil
-import base64
-
-# --- Helpers ---------------------------------------------------------------
-def safe_filename(filename: str) -> str:
-    # Remove any path components
-    return os.path.basename(filename)
-
-def parse_custom_params(text: str) -> dict:
-    out = {}
-    for line in text.splitlines():
-        line = line.strip()
-        if not line or line.startswith("#"):
-            continue
-        if "=" in line:
-            k, v = line.split("=", 1)
-            out[k.strip()] = v.strip()
-        else:
-            out[line] = True
-    return out
-
-def simulate_obfuscation(input_file_path, output_file_path, params):
-    """
-    For prototype: copy file. Real implementation: run clang/llvm toolchain & passes.
-    """
-    shutil.copy(input_file_path, output_file_path)
-
-    report = {
-        "input_parameters": params,
-        "output_file_size": os.path.getsize(output_file_path),
-        "method_of_obfuscation": f"Simulated Obfuscation (Level: {params.get('obfuscation_level')})",
-        "bogus_code_generated": "Approximately 50 lines (simulated)",
-        "cycles_completed": 3,
-        "string_obfuscations": 5,
-        "fake_loops_inserted": 2,
-    }
-    return report, output_file_path
+import html
+
+import profiling
+from profiling import stage
+
+from jobs import DONE, FAILED, FINISHED, QUEUED, RUNNING, JobQueue, QueueFullError
+from obfuscator import parse_custom_params, safe_filename, save_upload, serve_downloads
+from project_build import OBJECTS_DIR, OBJECTS_MAX_AGE, archive_stem, is_archive
+from result_cache import ResultCache
+from workspace import Reaper, create_workspace, start_reaper
 
 # --- Streamlit UI ---------------------------------------------------------
 st.set_page_config(page_title="LLVM Code Obfuscator Prototype", layout="wide")
 
+# Stage timings of every rerun and finished job, shared by all sessions;
+# PROFILE_PANEL=1 shows them
+@st.cache_resource
+def profiler():
+    return profiling.Profiler("Suraksha")
+
+profile_run = profiler().begin()
+
 # Basic CSS (ok for prototype; selectors may not always match Streamlit internals)
 st.markdown(
     """
@@ -57,35 +38,154 @@ st.title("LLVM Code Obfuscator Prototype")
 # Sidebar inputs
 st.sidebar.header("Input Parameters")
 
-uploaded_file = st.sidebar.file_uploader("Upload C/C++ source file", type=["c", "cpp", "h"])
+uploaded_file = st.sidebar.file_uploader(
+    "Upload C/C++ source file or project archive",
+    type=["c", "cpp", "h", "zip", "tar", "gz", "tgz"],
+    help="Archives (.zip, .tar, .tar.gz) are built as a project: each translation unit is "
+         "obfuscated in parallel and unchanged units are reused on resubmission.",
+)
 platform = st.sidebar.selectbox("Target Platform", ["Windows", "Linux"])
 obfuscation_level = st.sidebar.slider("Obfuscation Level (1-10)", 1, 10, 5)
 custom_params_text = st.sidebar.text_area("Custom Parameters (e.g., key1=value1)", "bogus_code_amount=50\nstring_encrypt=true")
 
-# Ensure directories exist
-os.makedirs("uploads", exist_ok=True)
-os.makedirs("outputs", exist_ok=True)
+# --- Job queue ------------------------------------------------------------
+# One bounded process pool per server, shared by every session; jobs keep
+# running (and their reports stay available) across reruns. Identical
+# submissions are answered from the on-disk result cache.
+@st.cache_resource
+def job_queue():
+    return JobQueue(cache=ResultCache(), profiler=profiler())
+
+# Deletes old job workspaces and published downloads (age and size quotas),
+# skipping workspaces of jobs that are still queued or running; the records
+# of finished jobs are dropped with their workspace. Incremental build
+# objects are kept much longer.
+@st.cache_resource
+def reaper():
+    return (start_reaper(keep=job_queue().active_workspaces, on_reap=job_queue().prune),
+            Reaper([OBJECTS_DIR], max_age=OBJECTS_MAX_AGE).start())
+
+reaper()
+
+# Streams outputs too large for Streamlit's static file handler
+@st.cache_resource
+def download_server():
+    try:
+        return serve_downloads()
+    except OSError:
+        return None  # port taken, e.g. by another instance serving the same files
+
+download_server()
+
+if "jobs" not in st.session_state:
+    st.session_state.jobs = []
+
+def render_report(report, download_url, obfuscated_path):
+    st.subheader("1. Input Parameters")
+    st.json(report["input_parameters"])
+
+    st.subheader("2. Output File Attributes")
+    st.write(f"- Size: {report['output_file_size']} bytes")
+    st.write(f"- Method of Obfuscation: {report['method_of_obfuscation']}")
+
+    st.subheader("3. Amount of Bogus Code Generated")
+    st.write(report["bogus_code_generated"])
+
+    st.subheader("4. Number of Cycles of Obfuscation Completed")
+    st.write(f"{report['cycles_completed']} cycles")
+
+    st.subheader("5. Number of String Obfuscations/Encryptions Done")
+    st.write(f"{report['string_obfuscations']} strings obfuscated")
+
+    st.subheader("6. Number of Fake Loops Inserted")
+    st.write(f"{report['fake_loops_inserted']} fake loops")
+
+    if "source_metrics" in report:
+        metrics = report["source_metrics"]
+        st.subheader("7. Source Analysis")
+        st.write(f"- Lines: {metrics['lines']}")
+        st.write(f"- Functions: {metrics['functions']}, loops: {metrics['loops']}, "
+                 f"string literals: {metrics['string_literals']}")
+
+    if "units" in report:
+        st.subheader("8. Incremental Project Build")
+        st.write(f"- Units rebuilt: {report['units_rebuilt']}, reused: {report['units_reused']}")
+        st.write(f"- Wall time: {report['wall_seconds']:.2f}s "
+                 f"(full serial rebuild: {report['full_rebuild_seconds']:.2f}s, "
+                 f"speedup: {report['speedup']:.1f}x)")
+        st.table([
+            {"unit": u["unit"], "status": u["status"], "seconds": round(u["seconds"], 4)}
+            for u in report["units"]
+        ])
+
+    # Provide download: streamed from disk by Streamlit's static file handler
+    # (or our download server for large outputs), never read into memory here
+    download_name = html.escape(os.path.basename(obfuscated_path), quote=True)
+    st.markdown(
+        f'<a href="{download_url}" download="{download_name}">Download Obfuscated File</a>',
+        unsafe_allow_html=True,
+    )
+
+def render_jobs():
+    queue = job_queue()
+    jobs = [queue.get(job_id) for job_id in reversed(st.session_state.jobs)]
+    jobs = [job for job in jobs if job is not None]
+    if not jobs:
+        return
+
+    st.header("Obfuscation Report")
+    for job in jobs:
+        name = job["params"].get("original_filename", job["id"])
+        cached = " (cached)" if job["cache"] == "hit" else ""
+        with st.expander(f"{name} — {job['status']}{cached}", expanded=job is jobs[0]):
+            if job["status"] in (QUEUED, RUNNING):
+                st.progress(job["progress"], text=job["stage"])
+                st.button("Cancel", key=f"cancel_{job['id']}", on_click=queue.cancel, args=(job["id"],))
+            elif job["status"] == DONE:
+                render_report(job["report"], job["download_url"], job["output_path"])
+            elif job["status"] == FAILED:
+                st.error(f"An error occurred during obfuscation: {job['error']}")
+            else:
+                st.info("Job cancelled.")
+
+    # Stop polling once this session has nothing in flight
+    if all(job["status"] in FINISHED for job in jobs) and st.session_state.get("jobs_polling"):
+        st.session_state.jobs_polling = False
+        st.rerun()
 
 if st.sidebar.button("Start Obfuscation"):
     if uploaded_file is None:
         st.error("Please upload a C or C++ source file to proceed.")
+    elif uploaded_file.name.lower().endswith(".gz") and not is_archive(uploaded_file.name):
+        # The uploader can only filter on the last suffix, so foo.c.gz gets this far
+        st.error("Only gzipped tar archives (.tar.gz, .tgz) are supported; upload single sources uncompressed.")
     else:
         try:
             # Sanitize filename
             original_name = safe_filename(uploaded_file.name)
-            base_name, ext = os.path.splitext(original_name)
+            if is_archive(original_name):
+                base_name = archive_stem(original_name)
+                ext = original_name[len(base_name):]
+            else:
+                base_name, ext = os.path.splitext(original_name)
+            # Each job gets its own workspace, so concurrent uploads of the
+            # same file name cannot overwrite each other
+            job_dir = create_workspace()
             # Keep original extension in saved upload to avoid confusion
-            saved_input_path = os.path.join("uploads", f"{base_name}{ext}")
+            saved_input_path = os.path.join(job_dir, f"{base_name}{ext}")
 
-            # Save uploaded file
-            with open(saved_input_path, "wb") as f:
-                f.write(uploaded_file.read())
+            # Save uploaded file (streamed in chunks)
+            with stage("upload"):
+                save_upload(uploaded_file, saved_input_path)
 
             # Prepare output filename (don't smash dots, keep base name)
-            out_ext = ".exe" if platform == "Windows" else ".bin"
+            if is_archive(original_name):
+                out_ext = ".zip"
+            else:
+                out_ext = ".exe" if platform == "Windows" else ".bin"
             # Use informative output filename
             output_file_name = f"obfuscated_{base_name}{out_ext}"
-            output_file_path = os.path.join("outputs", output_file_name)
+            output_file_path = os.path.join(job_dir, output_file_name)
 
             # Parse custom params
             parsed_params = parse_custom_params(custom_params_text)
@@ -98,42 +198,46 @@ if st.sidebar.button("Start Obfuscation"):
                 "original_filename": original_name,
             }
 
-            # Run simulation
-            report, obfuscated_path = simulate_obfuscation(saved_input_path, output_file_path, params)
-
-            # Display report
-            st.header("Obfuscation Report")
-            st.subheader("1. Input Parameters")
-            st.json(report["input_parameters"])
-
-            st.subheader("2. Output File Attributes")
-            st.write(f"- Size: {report['output_file_size']} bytes")
-            st.write(f"- Method of Obfuscation: {report['method_of_obfuscation']}")
-
-            st.subheader("3. Amount of Bogus Code Generated")
-            st.write(report["bogus_code_generated"])
-
-            st.subheader("4. Number of Cycles of Obfuscation Completed")
-            st.write(f"{report['cycles_completed']} cycles")
-
-            st.subheader("5. Number of String Obfuscations/Encryptions Done")
-            st.write(f"{report['string_obfuscations']} strings obfuscated")
-
-            st.subheader("6. Number of Fake Loops Inserted")
-            st.write(f"{report['fake_loops_inserted']} fake loops")
-
-            # Provide download (read bytes to be safe)
-            with open(obfuscated_path, "rb") as f:
-                data_bytes = f.read()
-            st.download_button(
-                label="Download Obfuscated File",
-                data=data_bytes,
-                file_name=os.path.basename(obfuscated_path),
-                mime="application/octet-stream"
-            )
+            # Queue the run; the report is shown below once the job finishes
+            with stage("submit"):
+                job_id = job_queue().submit(saved_input_path, output_file_path, params)
+            st.session_state.jobs.append(job_id)
 
+        except QueueFullError as e:
+            st.warning(f"The obfuscation queue is full: {e}")
         except Exception as e:
             st.error(f"An error occurred during obfuscation: {e}")
 
+# Refresh job status every second while anything is queued or running
+active = any(
+    (job := job_queue().get(job_id)) is not None and job["status"] not in FINISHED
+    for job_id in st.session_state.jobs
+)
+st.session_state.jobs_polling = active
+st.fragment(run_every=1.0 if active else None)(render_jobs)()
+
+with st.sidebar.expander("Job Queue Metrics"):
+    metrics = job_queue().metrics()
+    st.write(f"- Queue depth: {metrics['queue_depth']} (running: {metrics['running']})")
+    st.write(f"- Completed: {metrics['done']}, failed: {metrics['failed']}, cancelled: {metrics['cancelled']}")
+    st.write(f"- Wait p50/p95: {metrics['wait_p50_s']:.2f}s / {metrics['wait_p95_s']:.2f}s")
+    st.write(f"- Run p50/p95: {metrics['run_p50_s']:.2f}s / {metrics['run_p95_s']:.2f}s")
+
+with st.sidebar.expander("Result Cache"):
+    cache = job_queue().cache
+    stats = cache.stats()
+    st.write(f"- Hits: {stats['hits']}, misses: {stats['misses']} ({stats['hit_rate']:.0%} hit rate)")
+    st.write(f"- Entries: {stats['entries']} ({stats['bytes'] / 1024:.1f} KB of {cache.max_bytes / 1024**2:.0f} MB)")
+    entries = cache.entries()
+    if entries:
+        st.table([
+            {"key": m["key"][:12], "hits": m["hits"], "misses": m["misses"], "size (bytes)": m["size"]}
+            for m in entries
+        ])
+
 st.markdown("---")
 st.write("This is a generic prototype. Obfuscation is simulated for demonstration.")
+
+profiler().end(profile_run)
+if profiling.PANEL_ENABLED:
+    profiling.debug_panel(profiler(), st.sidebar)
@@ -0,0 +1,197 @@
+import os
+import sys
+import json
+import time
+import argparse
+import itertools
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+import email_parser
+import email_scanner
+import phish_service
+
+WORKERS = int(os.environ.get("SCAN_WORKERS", os.cpu_count() or 2))
+# Messages per task, and tasks in flight per worker: together they bound how
+# many results sit in memory between the pool and the writer.
+BATCH_SIZE = 256
+INFLIGHT_PER_WORKER = 2
+READ_CHUNK = 1024 * 1024
+PROGRESS_INTERVAL = 1.0
+
+
+# --- Sharding --------------------------------------------------------------
+def mbox_offsets(path, chunk_size=READ_CHUNK):
+    """Yield the byte offset of every "From " separator line in an mbox, in order, in one pass."""
+    with open(path, "rb") as f:
+        pos, tail = 0, b"\n"  # the file start counts as a line start
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            buf = tail + chunk
+            base = pos - len(tail)
+            i = buf.find(b"\nFrom ")
+            while i != -1:
+                # A separator needs 6 bytes, so one found here cannot repeat in the next buf
+                yield base + i + 1
+                i = buf.find(b"\nFrom ", i + 1)
+            pos += len(chunk)
+            tail = buf[-5:]  # enough to catch a separator split across chunks
+
+
+def mbox_spans(path):
+    """Yield (index, start, end) for every message of an mbox as the file is read."""
+    start, index = None, 0
+    for offset in mbox_offsets(path):
+        if start is not None:
+            yield index, start, offset
+            index += 1
+        start = offset
+    if start is not None:
+        yield index, start, os.path.getsize(path)
+
+
+def plan_tasks(path, batch_size=BATCH_SIZE):
+    """
+    Split the input into tasks of at most batch_size messages. Returns
+    (total messages, task generator); a task is ("eml", [paths]) or
+    ("mbox", path, [(id, start, end), ...]). An mbox is split as the
+    scheduler pulls tasks, so its total is None: nothing is held per message.
+    """
+    if os.path.isdir(path):
+        names = sorted(n for n in os.listdir(path)
+                       if n.lower().endswith(".eml") and os.path.isfile(os.path.join(path, n)))
+        tasks = (("eml", [os.path.join(path, n) for n in names[i:i + batch_size]])
+                 for i in range(0, len(names), batch_size))
+        return len(names), tasks
+    if path.lower().endswith(".eml"):
+        return 1, iter([("eml", [path])])
+
+    spans = mbox_spans(path)
+    batches = iter(lambda: list(itertools.islice(spans, batch_size)), [])
+    return None, (("mbox", path, batch) for batch in batches)
+
+
+def _mbox_lines(f, start, end):
+    """Stream one mbox message's lines, dropping the separator and unquoting >From."""
+    f.seek(start)
+    pos = start + len(f.readline())
+    while pos < end:
+        line = f.readline()
+        if not line:
+            break
+        pos += len(line)
+        yield line[1:] if line.startswith(b">From ") else line
+
+
+# --- Worker side -----------------------------------------------------------
+def _summary(msg_id, result):
+    return {
+        "id": msg_id,
+        "sender": result["sender"],
+        "score": result["score"],
+        "indicators": [i["type"] for i in result["indicators"]],
+        "reply_to": result["reply_to"],
+        "links": len(result["links"]),
+        "phishy_links": [link["url"] for link in result["links"] if link["is_phishy"]],
+        "attachments": len(result["attachments"]),
+    }
+
+
+def _scan_one(msg_id, parse):
+    """One message's summary, or an error record if it cannot be parsed or scored."""
+    try:
+        return _summary(msg_id, email_scanner.analyze_message(parse()))
+    except Exception as e:
+        return {"id": msg_id, "error": f"{type(e).__name__}: {e}"}
+
+
+def _scan_task(task):
+    results = []
+    if task[0] == "eml":
+        for path in task[1]:
+            results.append(_scan_one(os.path.basename(path), lambda: email_parser.parse_file(path)))
+    else:
+        _, path, spans = task
+        with open(path, "rb") as f:
+            for msg_id, start, end in spans:
+                results.append(_scan_one(msg_id, lambda: email_parser.parse_message(_mbox_lines(f, start, end))))
+    return results
+
+
+# --- Scheduler -------------------------------------------------------------
+def scan_archive(path, out, workers=WORKERS, batch_size=BATCH_SIZE, progress=None):
+    """
+    Scan an mbox, an .eml file or a directory of .eml files on a process pool
+    and write one JSON line per message to out as tasks complete; a message
+    that fails gets an {"id", "error"} line instead of stopping the scan. At most
+    workers * INFLIGHT_PER_WORKER tasks are outstanding at any time.
+    progress(done, total, elapsed) is called at most once per second.
+    """
+    start = time.perf_counter()
+    total, tasks = plan_tasks(path, batch_size)
+
+    # Pre-fork: load everything once in the parent so forked workers inherit
+    # it; with spawn each worker loads it once in its initializer instead.
+    phish_service.warm_up()
+    method = "fork" if "fork" in mp.get_all_start_methods() else "spawn"
+    done = flagged = errors = 0
+    last_report = start
+    with ProcessPoolExecutor(workers, mp_context=mp.get_context(method), initializer=phish_service.warm_up) as pool:
+        pending = set()
+        exhausted = False
+        while pending or not exhausted:
+            while not exhausted and len(pending) < workers * INFLIGHT_PER_WORKER:
+                task = next(tasks, None)
+                if task is None:
+                    exhausted = True
+                else:
+                    pending.add(pool.submit(_scan_task, task))
+            if not pending:
+                break
+            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                for record in future.result():
+                    out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                    flagged += bool(record.get("indicators"))
+                    errors += "error" in record
+                    done += 1
+            now = time.perf_counter()
+            if progress and now - last_report >= PROGRESS_INTERVAL:
+                progress(done, total, now - start)
+                last_report = now
+
+    elapsed = time.perf_counter() - start
+    return {
+        "count": done,
+        "flagged": flagged,
+        "errors": errors,
+        "workers": workers,
+        "elapsed_seconds": elapsed,
+        "messages_per_sec": done / elapsed if elapsed > 0 else 0.0,
+    }
+
+
+def _print_progress(done, total, elapsed):
+    rate = done / elapsed if elapsed > 0 else 0.0
+    counted = f"{done}/{total}" if total is not None else f"{done}"
+    print(f"\r{counted} messages, {rate:.0f} msg/s", end="", file=sys.stderr, flush=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scan a message archive on all cores, writing JSONL.")
+    parser.add_argument("path", help="mbox file, .eml file or directory of .eml files")
+    parser.add_argument("-o", "--output", help="JSONL output file (stdout if omitted)")
+    parser.add_argument("-j", "--workers", type=int, default=WORKERS)
+    parser.add_argument("--batch", type=int, default=BATCH_SIZE, help="messages per task")
+    args = parser.parse_args()
+
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    try:
+        report = scan_archive(args.path, out, args.workers, args.batch, _print_progress)
+    finally:
+        if args.output:
+            out.close()
+    print(f"\r{report['count']} messages, {report['flagged']} flagged, {report['errors']} errors, "
+          f"{report['workers']} workers, {report['elapsed_seconds']:.2f}s ({report['messages_per_sec']:.0f} msg/s)", file=sys.stderr)
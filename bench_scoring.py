@@ -0,0 +1,109 @@
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+
+import phish_service
+
+# Labelled samples: one JSON object per line with "label" ("phishing" or
+# "benign") and the "text" of an email or the "url" to check.
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpus")
+EMAIL_CORPUS = os.path.join(CORPUS_DIR, "emails.jsonl")
+URL_CORPUS = os.path.join(CORPUS_DIR, "urls.jsonl")
+PHISHING = "phishing"
+REPEATS = 200
+SEED = 0
+
+
+def load_corpus(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _percentile(values, p):
+    return values[min(len(values) - 1, int(p * len(values)))] if values else 0.0
+
+
+def _summarize(latencies, predicted, labels):
+    """Throughput, latency percentiles (ms) and detection accuracy of one run."""
+    latencies = sorted(latencies)
+    total = sum(latencies)
+    truth = [label == PHISHING for label in labels]
+    tp = sum(1 for p, t in zip(predicted, truth) if p and t)
+    fp = sum(1 for p, t in zip(predicted, truth) if p and not t)
+    fn = sum(1 for p, t in zip(predicted, truth) if not p and t)
+    correct = sum(1 for p, t in zip(predicted, truth) if p == t)
+    return {
+        "samples": len(labels),
+        "calls": len(latencies),
+        "per_sec": len(latencies) / total if total > 0 else 0.0,
+        "p50_ms": _percentile(latencies, 0.50) * 1000,
+        "p99_ms": _percentile(latencies, 0.99) * 1000,
+        "accuracy": correct / len(labels) if labels else 0.0,
+        "precision": tp / (tp + fp) if tp + fp else 0.0,
+        "recall": tp / (tp + fn) if tp + fn else 0.0,
+    }
+
+
+def _timed(fn, items, repeats):
+    """Call fn on every item repeats times; return per-call latencies and first-pass results."""
+    latencies, first = [], None
+    for _ in range(repeats):
+        results = []
+        for item in items:
+            start = time.perf_counter()
+            results.append(fn(item))
+            latencies.append(time.perf_counter() - start)
+        first = first or results
+    return latencies, first
+
+
+def bench_emails(samples, repeats=REPEATS, seed=SEED):
+    """analyze_email in seeded mode; a message is flagged when any indicator fires."""
+    texts = [s["text"] for s in samples]
+    latencies, results = _timed(lambda text: phish_service.score_email(text, seed=seed), texts, repeats)
+    report = _summarize(latencies, [bool(r["indicators"]) for r in results], [s["label"] for s in samples])
+    # Seeded scores must not change between runs
+    rescored = [phish_service.score_email(text, seed=seed)["score"] for text in texts]
+    report["deterministic"] = rescored == [r["score"] for r in results]
+    return report
+
+
+def bench_urls(samples, repeats=REPEATS):
+    """The URL checker page's verdict (is_phishy) for every sample."""
+    urls = [s["url"] for s in samples]
+    latencies, results = _timed(phish_service.score_url, urls, repeats)
+    return _summarize(latencies, [r["is_phishy"] for r in results], [s["label"] for s in samples])
+
+
+def run(repeats=REPEATS, seed=SEED, email_corpus=EMAIL_CORPUS, url_corpus=URL_CORPUS):
+    return {
+        "timestamp": time.time(),
+        "python": platform.python_version(),
+        "repeats": repeats,
+        "seed": seed,
+        "email": bench_emails(load_corpus(email_corpus), repeats, seed),
+        "url": bench_urls(load_corpus(url_corpus), repeats),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark email and URL scoring on the labelled corpus.")
+    parser.add_argument("--repeats", type=int, default=REPEATS)
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("--history", help="append the result as one JSON line to this file")
+    args = parser.parse_args()
+
+    result = run(args.repeats, args.seed)
+    for name in ("email", "url"):
+        r = result[name]
+        print(f"{name:5}  {r['samples']} samples x {args.repeats}: {r['per_sec']:.0f}/s, "
+              f"p50 {r['p50_ms']:.4f} ms, p99 {r['p99_ms']:.4f} ms, "
+              f"accuracy {r['accuracy']:.0%} (precision {r['precision']:.0%}, recall {r['recall']:.0%})")
+    if not result["email"]["deterministic"]:
+        print("warning: seeded email scores changed between runs", file=sys.stderr)
+    if args.history:
+        with open(args.history, "a", encoding="utf-8") as f:
+            f.write(json.dumps(result) + "\n")
@@ -1,9 +1,24 @@
+import time
+
 import streamlit as st
 import numpy as np
 import plotly.graph_objects as go
 
+import profiling
+from profiling import stage
+from field_solver import (CLOUD, DIPOLE, DIRECT_MAX_PAIRS, PRECISIONS, RADIATING, SINGLE, THETA, arrow_count,
+                          benchmark_tree, charge_config, compute_field, compute_radiation, lod_sample, profile_precision, trace_field_lines)
+from field_render import FIGURE_DTYPE, MODES, build_figure, field_json, field_npz
+
 st.set_page_config(layout="wide", page_title="MaxwellXR — Real-Time 3D Field Visualizer ∞ Prototype")
 
+# Stage timings of every rerun, shared by all sessions; PROFILE_PANEL=1 shows them
+@st.cache_resource
+def profiler():
+    return profiling.Profiler("blrGO")
+
+profile_run = profiler().begin()
+
 st.title("MaxwellXR — Real-Time 3D Electromagnetic Field Visualizer ∞ Prototype")
 st.markdown(
     "Interactive 3D vector field generated using Coulomb's law. "
@@ -12,108 +27,230 @@ st.markdown(
 
 # Sidebar controls
 st.sidebar.header("Controls")
-mode = st.sidebar.radio("Field Type", ("Single Point Charge", "Dipole (Oscillating)"))
+mode = st.sidebar.radio("Field Type", (SINGLE, DIPOLE, RADIATING, CLOUD))
+# Only the charge cloud has enough charges for the octree to pay off
+n_charges, theta = 0, 0.0
+if mode == CLOUD:
+    n_charges = st.sidebar.slider("Charges", 1000, 100000, 10000, step=1000)
+    if st.sidebar.radio("Solver", ("Barnes–Hut", "Direct"), horizontal=True) == "Barnes–Hut":
+        theta = st.sidebar.slider("Opening Angle (θ)", 0.1, 1.5, THETA, step=0.1,
+                                  help="Larger is faster and less accurate; cells smaller than θ × distance are summarized")
 q = st.sidebar.slider("Charge Magnitude (q)", -5.0, 5.0, 1.0, step=0.1)
 scale = st.sidebar.slider("Arrow Scale", 0.1, 5.0, 1.0, step=0.1)
-grid_n = st.sidebar.selectbox("Grid Resolution", [8, 10, 12, 15], index=1)
+grid_n = st.sidebar.selectbox("Grid Resolution", [8, 10, 12, 15, 32, 48, 64], index=1)
+lod = st.sidebar.checkbox("Level of Detail", True, help="Subsample arrows towards strong and fast-changing field")
+arrow_budget = st.sidebar.slider("Arrow Budget", 500, 20000, 4000, step=500, disabled=not lod)
 show_charge = st.sidebar.checkbox("Show Charges", True)
 t = st.sidebar.slider("Time (Dipole Oscillation)", 0.0, 6.28, 0.0, step=0.1)
+play = mode in (DIPOLE, RADIATING) and st.sidebar.checkbox("Play Oscillation", False)
+# Every frame carries its own copy of the arrows: at full resolution a fine
+# grid would ship hundreds of MB to the browser
+if play and not lod:
+    lod = True
+    st.sidebar.info("Playing always uses Level of Detail and the arrow budget.")
+# Field lines trace the electrostatic field of a few charges: not offered for
+# the radiating dipole or the charge cloud
+show_lines = mode in (SINGLE, DIPOLE) and st.sidebar.checkbox("Show Field Lines", False)
+vector_keys = ("u", "v", "w")
+if mode == RADIATING and st.sidebar.radio("Vectors", ("E", "B"), horizontal=True) == "B":
+    vector_keys = ("bu", "bv", "bw")
+seeds_per_charge = st.sidebar.slider("Seeds per Charge", 8, 200, 24, step=4, disabled=not show_lines)
+precision = st.sidebar.selectbox("Precision", list(PRECISIONS),
+                                 help="float32 halves the solver's memory; the figure is float32 either way")
+# Summing a big cloud directly over a fine grid would hold the server for minutes
+direct_pairs = n_charges * int(grid_n) ** 3
+if mode == CLOUD and theta == 0.0 and direct_pairs > DIRECT_MAX_PAIRS:
+    theta = THETA
+    st.sidebar.warning(f"Direct summation needs {direct_pairs:.1e} charge-point pairs (limit "
+                       f"{DIRECT_MAX_PAIRS:.1e}); using Barnes–Hut at θ = {THETA} instead.")
 
-# Create grid
-L = 1.0
-n = int(grid_n)
-xs = np.linspace(-L, L, n)
-ys = np.linspace(-L, L, n)
-zs = np.linspace(-L, L, n)
-X, Y, Z = np.meshgrid(xs, ys, zs, indexing="xy")
+rerun_start = time.perf_counter()
+frame_times = np.round(np.arange(0.0, 6.3, 0.1), 1)
 
-# Flatten
-x, y, z = X.ravel(), Y.ravel(), Z.ravel()
+# Field computation is cached across reruns; only (mode, q, grid_n, t, precision,
+# n_charges, theta) matter, so moving the arrow scale or toggling the charge
+# markers reuses the arrays.
+@st.cache_data(max_entries=32, show_spinner=False)
+def cached_field(mode, q, grid_n, t, precision, n_charges, theta):
+    return compute_field(mode, q, grid_n, t, dtype=PRECISIONS[precision], n_charges=n_charges, theta=theta)
 
-def electric_field(qval, rx, ry, rz, pos):
-    dx = rx - pos[0]
-    dy = ry - pos[1]
-    dz = rz - pos[2]
+@st.cache_data(max_entries=32, show_spinner=False)
+def cached_lod_field(mode, q, grid_n, t, precision, n_charges, theta, budget):
+    return lod_sample(cached_field(mode, q, grid_n, t, precision, n_charges, theta), budget)
 
-    r3 = (dx*dx + dy*dy + dz*dz)**1.5
-    r3 = np.where(r3 < 1e-6, 1e-6, r3)
+@st.cache_data(max_entries=8, show_spinner=False)
+def cached_radiation_frames(q, grid_n, precision, budget):
+    return compute_radiation(q, grid_n, frame_times, dtype=PRECISIONS[precision], budget=budget)
 
-    k = 1.0
-    return k*qval*dx/r3, k*qval*dy/r3, k*qval*dz/r3
+@st.cache_data(max_entries=32, show_spinner=False)
+def cached_field_lines(mode, q, t, per_charge):
+    return trace_field_lines(charge_config(mode, q, t), per_charge)
 
-# Field modes
-if mode == "Single Point Charge":
-    pos = (0.0, 0.0, 0.0)
-    Ex, Ey, Ez = electric_field(q, x, y, z, pos)
+@st.cache_data(max_entries=8, show_spinner=False)
+def cached_exports(mode, q, grid_n, t, precision, n_charges, theta, budget):
+    exported = (cached_lod_field(mode, q, grid_n, t, precision, n_charges, theta, budget) if budget
+                else cached_field(mode, q, grid_n, t, precision, n_charges, theta))
+    meta = {"mode": mode, "q": q, "grid_n": grid_n, "t": t, "budget": budget}
+    if mode == CLOUD:
+        meta.update(n_charges=n_charges, theta=theta)
+    return field_npz(exported), field_json(exported, meta)
 
+radiating_frames = play and mode == RADIATING
+
+if radiating_frames:
+    # Retardation makes every frame a different pattern; all frames come out
+    # of one vectorized solve, already normalized over the period.
+    field_key = (RADIATING, q, int(grid_n), t, precision, 0, 0.0)
+    amplitude = scale
+elif play:
+    # The dipole field is sin(t) times a fixed spatial pattern: solve it once
+    # at unit amplitude and scale it per frame. Arrows are normalized by the
+    # peak field so their length follows the oscillation.
+    field_key = (DIPOLE, 1.0, int(grid_n), np.pi / 2, precision, 0, 0.0)
+    amplitude = scale * np.sign(q)
 else:
-    sep = 0.4
-    q1 = q * np.sin(t)
-    q2 = -q1
-    pos1 = (-sep/2, 0.0, 0.0)
-    pos2 = ( sep/2, 0.0, 0.0)
+    # t only affects the dipole; normalize it so single-charge reruns share one entry
+    field_key = (mode, q, int(grid_n), t if mode in (DIPOLE, RADIATING) else 0.0, precision, n_charges, theta)
+    amplitude = scale
 
-    E1 = electric_field(q1, x, y, z, pos1)
-    E2 = electric_field(q2, x, y, z, pos2)
+total_cones = arrow_count(int(grid_n))
+with stage("field"):
+    if radiating_frames:
+        field = cached_radiation_frames(q, int(grid_n), precision, arrow_budget if lod else None)
+    else:
+        field = cached_lod_field(*field_key, arrow_budget) if lod else cached_field(*field_key)
 
-    Ex = E1[0] + E2[0]
-    Ey = E1[1] + E2[1]
-    Ez = E1[2] + E2[2]
+if radiating_frames:
+    def frame_vectors(i):
+        return tuple(field[k][i] * amplitude for k in vector_keys)
 
-# Scale
-mag = np.sqrt(Ex*Ex + Ey*Ey + Ez*Ez)
-mag_max = max(np.percentile(mag, 95), 1e-6)
+    u_v, v_v, w_v = frame_vectors(int(np.argmin(np.abs(frame_times - t))))
+else:
+    def frame_vectors(coeff):
+        return tuple(field[k] * coeff for k in vector_keys)
 
-u = Ex / mag_max * scale
-v = Ey / mag_max * scale
-w = Ez / mag_max * scale
+    u_v, v_v, w_v = frame_vectors(amplitude * np.sin(t) if play and mode == DIPOLE else amplitude)
 
-mask = (np.sqrt(x*x + y*y + z*z) > 0.07)
-x_v, y_v, z_v = x[mask], y[mask], z[mask]
-u_v, v_v, w_v = u[mask], v[mask], w[mask]
+# Fixed color range while playing, so colors follow the oscillation
+color_range = {}
+if play:
+    peak = np.sqrt(sum(field[k]**2 for k in vector_keys)).max(initial=0.0)
+    color_range = dict(cmin=0.0, cmax=float(abs(amplitude) * peak))
 
 # Plot
-fig = go.Figure()
-
-fig.add_trace(go.Cone(
-    x=x_v, y=y_v, z=z_v,
-    u=u_v, v=v_v, w=w_v,
-    sizemode="absolute",
-    sizeref=0.4,
-    showscale=False,
-    anchor="tail",
-    hoverinfo="skip",
-    opacity=0.85
-))
-
-if show_charge:
-    if mode == "Single Point Charge":
-        fig.add_trace(go.Scatter3d(
-            x=[0], y=[0], z=[0],
-            mode="markers",
-            marker=dict(size=6, color="red" if q > 0 else "blue")
-        ))
-    else:
-        fig.add_trace(go.Scatter3d(
-            x=[pos1[0], pos2[0]],
-            y=[0, 0],
-            z=[0, 0],
-            mode="markers",
-            marker=dict(size=6, color=["red", "blue"])
-        ))
-
-fig.update_layout(
-    scene=dict(
-        xaxis=dict(showbackground=False, visible=False),
-        yaxis=dict(showbackground=False, visible=False),
-        zaxis=dict(showbackground=False, visible=False),
-        aspectmode="cube"
-    ),
-    height=720,
-    margin=dict(l=0, r=0, t=30, b=0)
+lines = None
+if show_lines:
+    # All lines go into one trace, separated by NaN gaps
+    with stage("lines"):
+        lines = cached_field_lines(field_key[0], field_key[1], field_key[3], seeds_per_charge)
+figure_start = time.perf_counter()
+fig = build_figure(field, mode, q, (u_v, v_v, w_v), lines, show_charge, color_range)
+
+if play:
+    # Frames are serialized with the figure and played client-side, so the
+    # browser animates without a server round trip per time step.
+    frames = []
+    for i, ft in enumerate(frame_times):
+        vectors = frame_vectors(i) if radiating_frames else frame_vectors(amplitude * np.sin(ft))
+        fu, fv, fw = (a.astype(FIGURE_DTYPE) for a in vectors)
+        frames.append(go.Frame(name=f"{ft:.1f}", data=[go.Cone(u=fu, v=fv, w=fw)], traces=[0]))
+    fig.frames = frames
+
+    fig.update_layout(
+        updatemenus=[dict(
+            type="buttons",
+            showactive=False,
+            x=0.0, y=0.0, xanchor="left", yanchor="bottom",
+            buttons=[
+                dict(label="Play", method="animate",
+                     args=[None, dict(frame=dict(duration=60, redraw=True), fromcurrent=True, mode="immediate")]),
+                dict(label="Pause", method="animate",
+                     args=[[None], dict(frame=dict(duration=0, redraw=False), mode="immediate")]),
+            ],
+        )],
+        sliders=[dict(
+            active=int(np.argmin(np.abs(frame_times - t))),
+            currentvalue=dict(prefix="t = "),
+            pad=dict(t=30),
+            steps=[dict(label=f"{ft:.1f}", method="animate",
+                        args=[[f"{ft:.1f}"], dict(frame=dict(duration=0, redraw=True), mode="immediate")])
+                   for ft in frame_times],
+        )],
+    )
+
+figure_ready = time.perf_counter()
+profile_run.add("figure", figure_ready - figure_start)
+# Serializing the figure just to measure it costs as much as building it, so
+# the payload is estimated from its arrays: each goes out as a base64 float32
+# typed array. The profiling panel measures the real size instead.
+values = field["x"].size * (6 + 3 * len(fig.frames)) + (3 * lines[0].size if lines is not None else 0)
+payload_kb = values * np.dtype(FIGURE_DTYPE).itemsize * 4 / 3 / 1024
+if profiling.PANEL_ENABLED:
+    with stage("serialize"):
+        payload_kb = len(fig.to_json()) / 1024
+
+with stage("chart"):
+    st.plotly_chart(fig, use_container_width=True)
+st.caption(
+    f"Cones: {field['x'].size:,} of {total_cones:,} · "
+    f"Figure payload: {'' if profiling.PANEL_ENABLED else '~'}{payload_kb:,.0f} KB · "
+    f"Rerun time: {(figure_ready - rerun_start) * 1000:.1f} ms"
 )
 
-st.plotly_chart(fig, use_container_width=True)
+# Raw arrays for downstream tools, without the figure's text serialization.
+# Encoding them costs about as much as the solve, so they are built only
+# once asked for, and again whenever the field changes after that.
+with st.sidebar.expander("Export Field"):
+    export_key = (*field_key, arrow_budget if lod else None)
+    if st.button("Prepare Downloads", help="Encodes the current field as .npz and typed-array JSON"):
+        st.session_state.export_key = export_key
+    if st.session_state.get("export_key") == export_key:
+        slug = next(name for name, value in MODES.items() if value == field_key[0])
+        export_name = f"field_{slug}_n{field_key[2]}"
+        with stage("exports"):
+            npz_bytes, typed_json = cached_exports(*export_key)
+        st.download_button("Arrays (.npz, float32)", npz_bytes, file_name=f"{export_name}.npz")
+        st.download_button("Typed arrays (.json, base64 float32)", typed_json,
+                           file_name=f"{export_name}.json", mime="application/json")
+
+# Solver cost of each precision at the current grid, measured on demand
+with st.sidebar.expander("Precision Benchmark"):
+    if st.button("Measure", help="Times the field solve and its peak memory in float64 and float32"):
+        # Benchmark solves are kept out of this rerun's stage timings
+        with profiling.capture("benchmark"):
+            rows = profile_precision((int(grid_n),), mode, q or 1.0, n_charges=n_charges, theta=theta)
+        st.table([
+            {"precision": row["precision"],
+             "ms": f"{row['seconds'] * 1000:.1f}",
+             "peak MB": f"{row['peak_bytes'] / 1e6:.1f}",
+             "buffers MB": f"{row['workspace_bytes'] / 1e6:.1f}",
+             "max error": f"{row['max_error']:.1e}"}
+            for row in rows
+        ])
+
+# Octree error and speedup against direct summation at the current grid
+if mode == CLOUD:
+    with st.sidebar.expander("Barnes–Hut Accuracy"):
+        too_big = direct_pairs > DIRECT_MAX_PAIRS
+        if st.button("Compare with Direct", disabled=too_big,
+                     help=f"Needs at most {DIRECT_MAX_PAIRS:.1e} charge-point pairs: fewer charges or a coarser grid"
+                     if too_big else "Direct summation can take a while for large grids and clouds"):
+            with st.spinner("Summing directly..."), profiling.capture("benchmark"):
+                rows = benchmark_tree((int(grid_n),), n_charges, tuple(sorted({0.3, 0.5, 0.8, theta or THETA})),
+                                      charge_config(CLOUD, q or 1.0, 0.0, n_charges))
+            st.table([
+                {"θ": f"{row['theta']:.1f}",
+                 "direct s": f"{row['direct_s']:.2f}",
+                 "tree s": f"{row['tree_s']:.2f}",
+                 "speedup": f"{row['speedup']:.1f}x",
+                 "median error": f"{row['median_error']:.1e}",
+                 "p99 error": f"{row['p99_error']:.1e}"}
+                for row in rows
+            ])
 
 st.markdown("---")
 st.write("Team SKYNET | MaxwellXR ∞ Prototype")
+
+profiler().end(profile_run)
+if profiling.PANEL_ENABLED:
+    profiling.debug_panel(profiler(), st.sidebar)
@@ -0,0 +1,134 @@
+import re
+import sys
+import time
+import unicodedata
+
+# --- Skeletons -------------------------------------------------------------
+# A skeleton maps every character to a prototype it is commonly confused
+# with (after the UTS #39 idea), so "pаypal" with a Cyrillic "а", "paypa1" and
+# "paypal" all share the skeleton "paypal". Prototypes follow UTS #39 where
+# it matters for hostnames: "m" becomes "rn", "w" becomes "vv" and "d"
+# becomes "cl", so "rnicrosoft" and "microsoft" collide too.
+CONFUSABLES = {
+    # Cyrillic
+    "а": "a", "е": "e", "о": "o", "р": "p", "с": "c", "у": "y", "х": "x",
+    "і": "i", "ј": "j", "ѕ": "s", "ԁ": "cl", "һ": "h", "ԛ": "q", "ԝ": "vv",
+    "ү": "y", "ӏ": "l", "к": "k", "м": "rn", "т": "t", "в": "b", "н": "h",
+    "ɡ": "g", "ո": "n", "ս": "u", "օ": "o",
+    # Greek
+    "α": "a", "ο": "o", "ρ": "p", "ν": "v", "ι": "i", "κ": "k", "υ": "u",
+    "χ": "x", "ε": "e", "τ": "t", "μ": "u", "ω": "vv",
+    # Latin lookalikes and digits
+    "ı": "i", "ɩ": "i", "ɑ": "a", "ɒ": "a", "ʟ": "l", "ǀ": "l", "ł": "l",
+    "0": "o", "1": "l", "|": "l",
+    "m": "rn", "w": "vv", "d": "cl",
+}
+_TABLE = str.maketrans(CONFUSABLES)
+TOKEN_SPLIT_RE = re.compile(r"[-_]+")
+
+DEFAULT_BRANDS = [
+    "paypal", "apple", "google", "microsoft", "amazon", "netflix", "facebook",
+    "instagram", "whatsapp", "bankofamerica", "chase", "wellsfargo", "sbi",
+    "hdfcbank", "icicibank", "paytm",
+]
+
+
+def skeleton(text: str) -> str:
+    """Case-, width- and accent-folded form with confusables replaced."""
+    text = text.casefold()
+    if not text.isascii():
+        text = unicodedata.normalize("NFKD", text)
+        text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return text.translate(_TABLE)
+
+
+def decode_label(label: str) -> str:
+    """Unicode form of a punycode (xn--) label; other labels are returned as-is."""
+    if label.startswith("xn--"):
+        try:
+            return label[4:].encode("ascii").decode("punycode")
+        except UnicodeError:
+            return label
+    return label
+
+
+def host_tokens(host: str):
+    """
+    (token, as written) pairs worth comparing against brands: each label
+    (punycode decoded), its hyphen-separated parts, and the label with hyphens
+    removed, which is written as the hyphenated label ("pay-pal" -> "paypal").
+    """
+    tokens = {}
+    for label in host.lower().strip(".").split("."):
+        label = decode_label(label)
+        tokens.setdefault(label, label)
+        parts = TOKEN_SPLIT_RE.split(label)
+        if len(parts) > 1:
+            for part in parts:
+                tokens.setdefault(part, part)
+            tokens.setdefault("".join(parts), label)
+    tokens.pop("", None)
+    return list(tokens.items())
+
+
+# --- Index -----------------------------------------------------------------
+class BrandIndex:
+    """
+    Map from protected brands' skeletons to the brands. A hostname token is a
+    lookalike when its skeleton is a brand's skeleton but it is not written as
+    the brand itself, so each token costs one skeleton and one dict lookup no
+    matter how many brands are protected.
+    """
+
+    def __init__(self, brands=()):
+        self._by_skeleton = {}
+        for brand in brands:
+            self.add(brand)
+
+    @classmethod
+    def from_file(cls, path):
+        """Load one brand per line; blank lines and '#' comments are ignored."""
+        index = cls()
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith("#"):
+                    index.add(line)
+        return index
+
+    def __len__(self):
+        return len(self._by_skeleton)
+
+    def add(self, brand):
+        brand = brand.strip().lower()
+        if brand:
+            self._by_skeleton.setdefault(skeleton(brand), brand)
+
+    def find(self, host):
+        """Return {"brand", "token"} for every lookalike token of host."""
+        if not host:
+            return []
+        found = []
+        for token, written in host_tokens(host):
+            brand = self._by_skeleton.get(skeleton(token))
+            if brand is not None and written != brand:
+                found.append({"brand": brand, "token": written})
+        return found
+
+
+DEFAULT_BRAND_INDEX = BrandIndex(DEFAULT_BRANDS)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        sys.exit("usage: python brand_index.py <brands-file> <hosts-file>")
+    start = time.perf_counter()
+    index = BrandIndex.from_file(sys.argv[1])
+    built = time.perf_counter()
+    with open(sys.argv[2], encoding="utf-8") as f:
+        hosts = [line.strip() for line in f if line.strip()]
+    flagged = sum(1 for host in hosts if index.find(host))
+    done = time.perf_counter()
+    per_host_us = (done - built) * 1e6 / len(hosts) if hosts else 0.0
+    print(f"{len(index)} brand skeletons in {built - start:.2f}s; "
+          f"{len(hosts)} hosts, {flagged} lookalikes, {per_host_us:.1f} us/host")
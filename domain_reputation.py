@@ -0,0 +1,176 @@
+import os
+import sys
+import mmap
+import struct
+from functools import lru_cache
+from urllib.parse import urlsplit
+
+# --- Index format ----------------------------------------------------------
+# A flat reputation list has one "domain verdict" pair per line, where verdict
+# is "allow" or "deny". build_index() sorts it into a binary file:
+#
+#   header   MAGIC (8 bytes) | record count (uint64)
+#   offsets  count * uint64, absolute offset of each record, sorted by domain
+#   records  verdict byte (b"A" / b"D") followed by the domain and b"\n"
+#
+# Opening the index only maps the file; lookups binary-search the offsets.
+MAGIC = b"DREPIDX1"
+HEADER = struct.Struct("<8sQ")
+OFFSET = struct.Struct("<Q")
+VERDICTS = {"allow": b"A", "deny": b"D"}
+VERDICT_NAMES = {v[0]: k for k, v in VERDICTS.items()}
+
+DEFAULT_LIST_PATH = os.environ.get(
+    "DOMAIN_REPUTATION_LIST",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "domain_reputation.txt"))
+CACHE_SIZE = 65536
+
+
+def normalize_domain(domain: str) -> str:
+    return domain.strip().strip(".").lower()
+
+
+def _key(domain: str) -> bytes:
+    # Internationalized names are stored in their punycode (xn--) form.
+    return domain.encode("ascii") if domain.isascii() else domain.encode("idna")
+
+
+def build_index(list_path, index_path):
+    """Compile a flat reputation list into a sorted binary index."""
+    entries = {}
+    with open(list_path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            parts = line.split()
+            verdict = parts[1].lower() if len(parts) > 1 else "deny"
+            if verdict not in VERDICTS:
+                continue
+            try:
+                entries[_key(normalize_domain(parts[0]))] = VERDICTS[verdict]
+            except UnicodeError:
+                continue
+
+    keys = sorted(entries)
+    tmp_path = index_path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, len(keys)))
+        pos = HEADER.size + OFFSET.size * len(keys)
+        for key in keys:
+            f.write(OFFSET.pack(pos))
+            pos += len(key) + 2
+        for key in keys:
+            f.write(entries[key] + key + b"\n")
+    os.replace(tmp_path, index_path)
+    return len(keys)
+
+
+class DomainReputation:
+    """Read-only view over a memory-mapped reputation index."""
+
+    def __init__(self, index_path):
+        self._file = open(index_path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.count = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"{index_path} is not a domain reputation index")
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+    def _record(self, i):
+        start = OFFSET.unpack_from(self._map, HEADER.size + OFFSET.size * i)[0]
+        end = self._map.find(b"\n", start)
+        return self._map[start + 1:end], self._map[start]
+
+    def _exact(self, key: bytes):
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            domain, verdict = self._record(mid)
+            if domain < key:
+                lo = mid + 1
+            elif domain > key:
+                hi = mid
+            else:
+                return VERDICT_NAMES[verdict]
+        return None
+
+    def lookup(self, domain):
+        """
+        Return "allow", "deny" or None. A listed parent domain also covers its
+        subdomains; the most specific listed entry wins.
+        """
+        labels = normalize_domain(domain).split(".")
+        for i in range(len(labels) - 1):
+            try:
+                key = _key(".".join(labels[i:]))
+            except UnicodeError:
+                continue
+            verdict = self._exact(key)
+            if verdict is not None:
+                return verdict
+        return None
+
+
+def open_reputation(list_path=DEFAULT_LIST_PATH):
+    """
+    Open the index for list_path, rebuilding it only when the flat list is
+    newer. Returns None when no list is configured.
+    """
+    index_path = list_path + ".idx"
+    if not os.path.exists(list_path):
+        return DomainReputation(index_path) if os.path.exists(index_path) else None
+    if not os.path.exists(index_path) or os.path.getmtime(index_path) < os.path.getmtime(list_path):
+        build_index(list_path, index_path)
+    return DomainReputation(index_path)
+
+
+# --- Shared cached lookup ---------------------------------------------------
+_store = None
+_store_loaded = False
+
+
+def get_store():
+    global _store, _store_loaded
+    if not _store_loaded:
+        _store = open_reputation()
+        _store_loaded = True
+    return _store
+
+
+def set_store(store):
+    """Swap the process-wide store (e.g. a different list) and drop the cache."""
+    global _store, _store_loaded
+    _store, _store_loaded = store, True
+    domain_reputation.cache_clear()
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def domain_reputation(domain):
+    store = get_store()
+    if store is None or not domain:
+        return None
+    return store.lookup(domain)
+
+
+def email_domain(address):
+    return address.rpartition("@")[2] if "@" in address else None
+
+
+def url_host(url):
+    """Lowercase hostname of url, or None when it has none or cannot be parsed."""
+    try:
+        return urlsplit(url if "//" in url else "//" + url).hostname
+    except ValueError:
+        return None  # e.g. "http://[oops": an unterminated IPv6 literal
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        sys.exit("usage: python domain_reputation.py <reputation-list>")
+    count = build_index(sys.argv[1], sys.argv[1] + ".idx")
+    print(f"indexed {count} domains into {sys.argv[1]}.idx")
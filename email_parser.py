@@ -0,0 +1,251 @@
+import io
+import re
+import sys
+import html
+import quopri
+import itertools
+import binascii
+from email.header import decode_header, make_header
+
+# Text and HTML bodies are kept up to this many encoded bytes per part; the
+# rest of a part, and every attachment, is only counted while streaming past.
+MAX_TEXT_PART = 1024 * 1024
+MAX_HEADER_BYTES = 256 * 1024
+
+HEADER_RE = re.compile(rb"^[!-9;-~]+:")
+PARAM_RE = re.compile(r';\s*([\w.-]+)\s*=\s*("(?:\\.|[^"])*"|[^;\s]*)')
+URL_RE = re.compile(r"""https?://[^\s<>"'()\[\]{}]+""", re.IGNORECASE)
+HREF_RE = re.compile(r"""\bhref\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>]+))""", re.IGNORECASE)
+ADDRESS_RE = re.compile(r"""[^\s<>"',;:@]+@[^\s<>"',;:@]+""")
+ANGLE_ADDRESS_RE = re.compile(r"""<([^\s<>"',;:@]+@[^\s<>"',;:@]+)>""")
+TAG_RE = re.compile(r"<(?:script|style)\b.*?</(?:script|style)\s*>|<[^>]*>", re.IGNORECASE | re.DOTALL)
+TRAILING_PUNCT = ".,;:!?"
+
+
+# --- Headers ---------------------------------------------------------------
+def _decode_header(raw: bytes) -> str:
+    value = raw.decode("utf-8", errors="replace").strip()
+    if "=?" not in value:
+        return value
+    try:
+        return str(make_header(decode_header(value)))
+    except (ValueError, LookupError, UnicodeError):
+        return value
+
+
+def _content_type(headers):
+    """(type/subtype, params) with RFC 2045 defaults."""
+    value = headers.get("content-type", ["text/plain"])[0]
+    ctype = value.split(";", 1)[0].strip().lower() or "text/plain"
+    params = {k.lower(): v.strip('"') for k, v in PARAM_RE.findall(value)}
+    return ctype, params
+
+
+class _Lines:
+    """Line iterator with pushback; hot loops iterate .it directly."""
+
+    def __init__(self, lines):
+        self.it = iter(lines)
+
+    def next(self):
+        return next(self.it, None)
+
+    def push(self, line):
+        self.it = itertools.chain([line], self.it)
+
+
+def _read_headers(lines):
+    """
+    Read a header block into {lowercase name: [values]}. A first line that is
+    not a header (pasted text without headers) is left for the body.
+    """
+    headers, name, value, size = {}, None, b"", 0
+    while True:
+        line = lines.next()
+        if line is None or not line.strip():
+            break
+        size += len(line)
+        if line[:1] in (b" ", b"\t") and name:
+            if size <= MAX_HEADER_BYTES:
+                value += b" " + line.strip()
+            continue
+        if not HEADER_RE.match(line):
+            lines.push(line)
+            break
+        if name:
+            headers.setdefault(name, []).append(_decode_header(value))
+        raw_name, _, rest = line.partition(b":")
+        name, value = raw_name.decode("ascii").lower(), rest.strip()
+    if name:
+        headers.setdefault(name, []).append(_decode_header(value))
+    return headers
+
+
+# --- Body ------------------------------------------------------------------
+def _delimiter(line, boundaries):
+    """(boundary, closing) if line is a delimiter of an enclosing multipart."""
+    if not boundaries:
+        return None
+    stripped = line.rstrip(b"\r\n \t")
+    for boundary in reversed(boundaries):
+        if stripped == b"--" + boundary:
+            return boundary, False
+        if stripped == b"--" + boundary + b"--":
+            return boundary, True
+    return None
+
+
+def _decode_body(raw, encoding, charset):
+    encoding = encoding.lower()
+    try:
+        if encoding == "base64":
+            raw = binascii.a2b_base64(raw)
+        elif encoding == "quoted-printable":
+            raw = quopri.decodestring(raw)
+    except (binascii.Error, ValueError):
+        pass
+    try:
+        return raw.decode(charset or "utf-8", errors="replace")
+    except LookupError:
+        return raw.decode("utf-8", errors="replace")
+
+
+class _Parser:
+    def __init__(self):
+        self.text, self.html, self.attachments = [], [], []
+        self.skipped_bytes = 0
+
+    def entity(self, lines, headers, boundaries):
+        """Consume one entity; return the delimiter that ended it, or None at EOF."""
+        ctype, params = _content_type(headers)
+        if ctype.startswith("multipart/") and params.get("boundary"):
+            return self.multipart(lines, params["boundary"].encode("latin-1", "replace"), boundaries)
+        if ctype == "message/rfc822":
+            return self.entity(lines, _read_headers(lines), boundaries)
+
+        disposition = headers.get("content-disposition", [""])[0].lower()
+        wanted = ctype in ("text/plain", "text/html") and not disposition.startswith("attachment")
+        kept, size, hit = [], 0, None
+        for line in lines.it:
+            if line[:2] == b"--":
+                hit = _delimiter(line, boundaries)
+                if hit:
+                    break
+            size += len(line)
+            if wanted and size <= MAX_TEXT_PART:
+                kept.append(line)
+
+        if wanted:
+            encoding = headers.get("content-transfer-encoding", ["7bit"])[0]
+            body = _decode_body(b"".join(kept), encoding, params.get("charset"))
+            (self.html if ctype == "text/html" else self.text).append(body)
+            self.skipped_bytes += max(0, size - MAX_TEXT_PART)
+        else:
+            filename = params.get("name") or dict(
+                (k.lower(), v.strip('"')) for k, v in PARAM_RE.findall(disposition)).get("filename")
+            self.attachments.append({"content_type": ctype, "filename": filename, "size": size})
+            self.skipped_bytes += size
+        return hit
+
+    def multipart(self, lines, boundary, boundaries):
+        inner = boundaries + [boundary]
+        hit = self.skip(lines, inner)  # preamble
+        while hit and hit == (boundary, False):
+            hit = self.entity(lines, _read_headers(lines), inner)
+        if hit == (boundary, True):
+            hit = self.skip(lines, boundaries)  # epilogue
+        return hit
+
+    def skip(self, lines, boundaries):
+        for line in lines.it:
+            if line[:2] == b"--":
+                hit = _delimiter(line, boundaries)
+                if hit:
+                    return hit
+        return None
+
+
+# --- Links -----------------------------------------------------------------
+def _clean_url(url):
+    return html.unescape(url).rstrip(TRAILING_PUNCT)
+
+
+def extract_links(text_parts, html_parts):
+    """Every http(s) link in text bodies, HTML hrefs and HTML text, in order, once each."""
+    found = []
+    for part in text_parts:
+        found += URL_RE.findall(part)
+    for part in html_parts:
+        for groups in HREF_RE.findall(part):
+            href = next(g for g in groups if g) if any(groups) else ""
+            if href.lower().startswith(("http://", "https://")):
+                found.append(href)
+        found += URL_RE.findall(html_to_text(part))
+    return list(dict.fromkeys(_clean_url(url) for url in found))
+
+
+def html_to_text(markup):
+    return html.unescape(TAG_RE.sub(" ", markup))
+
+
+# --- Entry points ----------------------------------------------------------
+def _address(headers, name):
+    """
+    The address in the first such header: the <angle-addr> if present, else
+    the first bare address (pasted text is rarely RFC-clean).
+    """
+    values = headers.get(name)
+    if not values:
+        return None
+    m = ANGLE_ADDRESS_RE.search(values[0]) or ADDRESS_RE.search(values[0])
+    return m.group(m.lastindex or 0).lower() if m else None
+
+
+def parse_message(lines):
+    """
+    Parse an RFC 5322 message from an iterable of byte lines in one pass.
+    Returns a dict with the sender headers (from, reply_to, return_path),
+    subject, the Received chain, decoded text and HTML bodies, every
+    embedded link and a list of skipped attachments.
+    """
+    lines = _Lines(lines)
+    headers = _read_headers(lines)
+    parser = _Parser()
+    parser.entity(lines, headers, [])
+
+    return {
+        "headers": headers,
+        "from": _address(headers, "from"),
+        "reply_to": _address(headers, "reply-to"),
+        "return_path": _address(headers, "return-path"),
+        "subject": headers.get("subject", [""])[0],
+        "received": headers.get("received", []),
+        "text": "\n".join(parser.text),
+        "html": "\n".join(parser.html),
+        "links": extract_links(parser.text, parser.html),
+        "attachments": parser.attachments,
+        "skipped_bytes": parser.skipped_bytes,
+    }
+
+
+def parse_bytes(data: bytes):
+    return parse_message(io.BytesIO(data))
+
+
+def parse_text(text: str):
+    return parse_bytes(text.encode("utf-8", errors="surrogatepass"))
+
+
+def parse_file(path):
+    with open(path, "rb") as f:
+        return parse_message(f)
+
+
+if __name__ == "__main__":
+    for source in sys.argv[1:]:
+        parsed = parse_file(source)
+        print(source, {k: parsed[k] for k in ("from", "reply_to", "return_path", "subject")})
+        print(f"  {len(parsed['received'])} Received hops, {len(parsed['links'])} links, "
+              f"{len(parsed['attachments'])} attachments ({parsed['skipped_bytes']} bytes skipped)")
+        for url in parsed["links"]:
+            print("  ", url)
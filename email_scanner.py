@@ -0,0 +1,204 @@
+import os
+import re
+import sys
+import time
+import random
+import hashlib
+import mailbox
+
+import domain_reputation
+import email_parser
+import url_index
+from profiling import stage
+
+# --- Rules -----------------------------------------------------------------
+# Each content rule is (name, pattern, indicator, score). Patterns must not
+# contain capturing groups: they are joined into one combined matcher where
+# each rule becomes a named group.
+CONTENT_RULES = [
+    ("urgency", r"urgent|act now",
+     {'type': 'Urgency/Threat', 'message': 'Uses urgent language.', 'severity': 'medium'}, 20),
+]
+
+SENDER_INDICATOR = {'type': 'Suspicious Sender', 'message': 'Non-Gmail sender.', 'severity': 'high'}
+SENDER_SCORE = 40
+BLOCKED_SENDER_INDICATOR = {'type': 'Blocklisted Sender', 'message': 'Sender domain has a deny reputation.', 'severity': 'high'}
+BLOCKED_SENDER_SCORE = 60
+TRUSTED_SENDER_SUFFIX = '@gmail.com'
+REPLY_TO_INDICATOR = {'type': 'Reply-To Mismatch', 'message': 'Replies go to a different domain than the sender.', 'severity': 'medium'}
+REPLY_TO_SCORE = 20
+LINK_INDICATOR = {'type': 'Suspicious Link', 'message': 'Contains a link flagged by the URL checker.', 'severity': 'high'}
+LINK_SCORE = 30
+
+# Scores get up to JITTER_MAX random points. With a seed the jitter is derived
+# from (seed, content) instead, so the same message always scores the same.
+JITTER_MAX = 5
+_seed_env = os.environ.get("PHISH_SCORE_SEED")
+DEFAULT_SEED = int(_seed_env) if _seed_env else None
+
+FROM_RE = re.compile(r'From:\s*<?([^>]+@[^>\s]+)>?', re.IGNORECASE)
+
+
+class RuleSet:
+    """Content rules compiled once into a single alternation."""
+
+    def __init__(self, rules=CONTENT_RULES):
+        self.rules = {name: (indicator, score) for name, _, indicator, score in rules}
+        self.order = [name for name, _, _, _ in rules]
+        combined = "|".join(f"(?P<{name}>{pattern})" for name, pattern, _, _ in rules)
+        self.matcher = re.compile(combined, re.IGNORECASE) if rules else None
+
+    def match(self, content):
+        """Return the names of rules that fire on content, in rule order."""
+        if self.matcher is None:
+            return []
+        fired = set()
+        for m in self.matcher.finditer(content):
+            fired.add(m.lastgroup)
+            if len(fired) == len(self.order):
+                break
+        return [name for name in self.order if name in fired]
+
+
+DEFAULT_RULESET = RuleSet()
+
+
+# --- Scoring ---------------------------------------------------------------
+def jitter(content, seed=None) -> int:
+    """0..JITTER_MAX points: random without a seed, a hash of (seed, content) with one."""
+    if seed is None:
+        return random.randint(0, JITTER_MAX)
+    digest = hashlib.blake2b(f"{seed}\0{content}".encode("utf-8", "surrogatepass"), digest_size=8).digest()
+    return int.from_bytes(digest, "big") % (JITTER_MAX + 1)
+
+
+def analyze_email(content, sender_placeholder="Not Found", ruleset=None, seed=DEFAULT_SEED):
+    result = analyze_message(content, sender_placeholder, ruleset, seed)
+    return result["sender"], result["indicators"], result["score"]
+
+
+def analyze_message(message, sender_placeholder="Not Found", ruleset=None, seed=DEFAULT_SEED, index=None):
+    """
+    Score one message: text or bytes (parsed here) or an email_parser result.
+    Headers give the sender and Reply-To; content rules run over the subject
+    and decoded bodies; every embedded link is classified in one batch.
+    """
+    ruleset = ruleset or DEFAULT_RULESET
+    pasted = isinstance(message, str)
+    with stage("parse"):
+        if isinstance(message, bytes):
+            parsed = email_parser.parse_bytes(message)
+        elif pasted:
+            parsed = email_parser.parse_text(message)
+        else:
+            parsed = message
+    from_header = parsed["headers"].get("from", [""])[0]
+    content = "\n".join([from_header, parsed["subject"], parsed["text"], email_parser.html_to_text(parsed["html"])])
+    links = parsed["links"]
+    # Pasted text is often not a message: a first line such as "URGENT: act
+    # now" or a bare "https://..." parses as a header and never reaches the
+    # body, so rules and link extraction also run over the raw text.
+    if pasted:
+        content += "\n" + message
+        links = list(dict.fromkeys(links + email_parser.extract_links([message], [])))
+
+    sender_email = parsed["from"] or sender_placeholder
+    if sender_email == sender_placeholder:
+        from_match = FROM_RE.search(parsed["text"])
+        if from_match:
+            sender_email = from_match.group(1).strip().lower()
+
+    phishing_indicators = []
+    score = 0
+    if sender_email != sender_placeholder:
+        sender_domain = domain_reputation.email_domain(sender_email)
+        reputation = domain_reputation.domain_reputation(sender_domain)
+        if reputation == "deny":
+            phishing_indicators.append(dict(BLOCKED_SENDER_INDICATOR))
+            score += BLOCKED_SENDER_SCORE
+        elif reputation != "allow" and not sender_email.endswith(TRUSTED_SENDER_SUFFIX):
+            phishing_indicators.append(dict(SENDER_INDICATOR))
+            score += SENDER_SCORE
+        if parsed["reply_to"] and domain_reputation.email_domain(parsed["reply_to"]) != sender_domain:
+            phishing_indicators.append(dict(REPLY_TO_INDICATOR))
+            score += REPLY_TO_SCORE
+    for name in ruleset.match(content):
+        indicator, rule_score = ruleset.rules[name]
+        phishing_indicators.append(dict(indicator))
+        score += rule_score
+
+    with stage("links"):
+        links = url_index.classify_urls(links, index)
+    if any(link["is_phishy"] for link in links):
+        phishing_indicators.append(dict(LINK_INDICATOR))
+        score += LINK_SCORE
+
+    return {
+        "sender": sender_email,
+        "indicators": phishing_indicators,
+        "score": min(100, score + jitter(content, seed)),
+        "links": links,
+        "reply_to": parsed["reply_to"],
+        "return_path": parsed["return_path"],
+        "received": parsed["received"],
+        "attachments": parsed["attachments"],
+    }
+
+
+def scan_messages(messages, ruleset=None, seed=DEFAULT_SEED):
+    """
+    Score an iterable of messages in one pass.
+
+    Items may be messages (pasted str, raw bytes) or (message_id, message)
+    pairs. Returns a dict with per-message results and throughput figures.
+    """
+    ruleset = ruleset or DEFAULT_RULESET
+    results = []
+    start = time.perf_counter()
+    for i, item in enumerate(messages):
+        msg_id, message = item if isinstance(item, tuple) else (i, item)
+        result = analyze_message(message, ruleset=ruleset, seed=seed)
+        results.append({"id": msg_id, "sender": result["sender"], "indicators": result["indicators"],
+                        "score": result["score"], "links": result["links"]})
+    elapsed = time.perf_counter() - start
+
+    return {
+        "results": results,
+        "count": len(results),
+        "elapsed_seconds": elapsed,
+        "messages_per_sec": len(results) / elapsed if elapsed > 0 else 0.0,
+    }
+
+
+# --- Input sources ---------------------------------------------------------
+def iter_messages(path):
+    """
+    Yield (message_id, raw bytes) from a single .eml file, an mbox file, or a
+    directory of .eml files. Bytes are parsed as messages; only str input is
+    treated as pasted text.
+    """
+    if os.path.isdir(path):
+        for name in sorted(os.listdir(path)):
+            full = os.path.join(path, name)
+            if os.path.isfile(full) and name.lower().endswith(".eml"):
+                with open(full, "rb") as f:
+                    yield name, f.read()
+    elif path.lower().endswith(".eml"):
+        with open(path, "rb") as f:
+            yield os.path.basename(path), f.read()
+    else:
+        box = mailbox.mbox(path, create=False)
+        try:
+            for key, msg in box.iteritems():
+                yield key, msg.as_bytes()
+        finally:
+            box.close()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        sys.exit("usage: python email_scanner.py <mbox | file.eml | eml-directory>")
+    report = scan_messages(iter_messages(sys.argv[1]))
+    flagged = sum(1 for r in report["results"] if r["indicators"])
+    print(f"{report['count']} messages, {flagged} flagged, "
+          f"{report['elapsed_seconds']:.3f}s ({report['messages_per_sec']:.0f} msg/s)")
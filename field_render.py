@@ -0,0 +1,216 @@
+import io
+import os
+import sys
+import json
+import time
+import base64
+import argparse
+
+import numpy as np
+import plotly.graph_objects as go
+
+from field_solver import CLOUD, CLOUD_CHARGES, DIPOLE, RADIATING, SINGLE, charge_config, compute_field, lod_sample, trace_field_lines
+
+# Figures and exports carry float32: plenty for plotting, half the bytes.
+FIGURE_DTYPE = np.float32
+FIELD_ARRAYS = ("charges", "x", "y", "z", "u", "v", "w", "strength", "detail")
+MODES = {"single": SINGLE, "dipole": DIPOLE, "radiating": RADIATING, "cloud": CLOUD}
+# Charge markers drawn for a charge cloud at most
+MAX_MARKERS = 2000
+FORMATS = ("npy", "json", "html", "png")
+
+
+# --- Encoding --------------------------------------------------------------
+def typed_array(values, dtype=FIGURE_DTYPE) -> dict:
+    """
+    Plotly.js typed-array spec: little-endian bytes, base64 encoded. Decodes
+    with np.frombuffer(base64.b64decode(bdata), dtype) or new Float32Array().
+    """
+    arr = np.ascontiguousarray(values, dtype=np.dtype(dtype).newbyteorder("<"))
+    return {"dtype": arr.dtype.str[1:], "shape": list(arr.shape),
+            "bdata": base64.b64encode(arr.tobytes()).decode("ascii")}
+
+
+def save_field(field, directory, meta=None):
+    """One .npy per array plus meta.json; load_field() memory-maps them back."""
+    os.makedirs(directory, exist_ok=True)
+    for name in FIELD_ARRAYS:
+        if name in field:
+            np.save(os.path.join(directory, f"{name}.npy"), np.asarray(field[name], dtype=FIGURE_DTYPE))
+    with open(os.path.join(directory, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta or {}, f)
+
+
+def load_field(directory, mmap=True):
+    field = {}
+    for name in FIELD_ARRAYS:
+        path = os.path.join(directory, f"{name}.npy")
+        if os.path.exists(path):
+            field[name] = np.load(path, mmap_mode="r" if mmap else None)
+    with open(os.path.join(directory, "meta.json"), encoding="utf-8") as f:
+        field["meta"] = json.load(f)
+    return field
+
+
+def field_npz(field) -> bytes:
+    buf = io.BytesIO()
+    np.savez(buf, **{name: np.asarray(field[name], dtype=FIGURE_DTYPE) for name in FIELD_ARRAYS if name in field})
+    return buf.getvalue()
+
+
+def field_json(field, meta=None) -> str:
+    return json.dumps({"meta": meta or {}, **{name: typed_array(field[name]) for name in FIELD_ARRAYS if name in field}})
+
+
+# --- Figure ----------------------------------------------------------------
+def build_figure(field, mode, q, vectors, lines=None, show_charge=True, color_range=None):
+    """
+    The visualizer's figure: one cone trace (trace 0) for vectors = (u, v, w),
+    optional field lines as one NaN-separated trace, and charge markers.
+    """
+    u, v, w = (np.asarray(a, dtype=FIGURE_DTYPE) for a in vectors)
+    fig = go.Figure()
+    fig.add_trace(go.Cone(
+        x=np.asarray(field["x"], dtype=FIGURE_DTYPE),
+        y=np.asarray(field["y"], dtype=FIGURE_DTYPE),
+        z=np.asarray(field["z"], dtype=FIGURE_DTYPE),
+        u=u, v=v, w=w,
+        sizemode="absolute",
+        sizeref=0.4,
+        showscale=False,
+        anchor="tail",
+        hoverinfo="skip",
+        opacity=0.85,
+        **(color_range or {})
+    ))
+
+    if lines is not None:
+        lx, ly, lz = (np.asarray(a, dtype=FIGURE_DTYPE) for a in lines)
+        fig.add_trace(go.Scatter3d(
+            x=lx, y=ly, z=lz,
+            mode="lines",
+            line=dict(width=2, color="orange"),
+            connectgaps=False,
+            hoverinfo="skip",
+            showlegend=False
+        ))
+
+    if show_charge:
+        charges = field["charges"]
+        if mode == SINGLE:
+            fig.add_trace(go.Scatter3d(
+                x=[0], y=[0], z=[0],
+                mode="markers",
+                marker=dict(size=6, color="red" if q > 0 else "blue")
+            ))
+        elif mode == CLOUD:
+            shown = charges[:MAX_MARKERS]
+            fig.add_trace(go.Scatter3d(
+                x=shown[:, 0].astype(FIGURE_DTYPE),
+                y=shown[:, 1].astype(FIGURE_DTYPE),
+                z=shown[:, 2].astype(FIGURE_DTYPE),
+                mode="markers",
+                hoverinfo="skip",
+                marker=dict(size=2, color=np.where(shown[:, 3] > 0, "red", "blue"))
+            ))
+        else:
+            fig.add_trace(go.Scatter3d(
+                x=charges[:, 0],
+                y=charges[:, 1],
+                z=charges[:, 2],
+                mode="markers",
+                marker=dict(size=6, color=["red", "blue"])
+            ))
+
+    fig.update_layout(
+        scene=dict(
+            xaxis=dict(showbackground=False, visible=False),
+            yaxis=dict(showbackground=False, visible=False),
+            zaxis=dict(showbackground=False, visible=False),
+            aspectmode="cube"
+        ),
+        height=720,
+        margin=dict(l=0, r=0, t=30, b=0)
+    )
+    return fig
+
+
+# --- Headless sweep --------------------------------------------------------
+def parse_values(spec):
+    """"1.0" -> [1.0]; "0:6.2:0.5" -> start, stop (inclusive), step; "1,2,3" -> list."""
+    if ":" in spec:
+        start, stop, step = (float(s) for s in spec.split(":"))
+        return [round(v, 6) for v in np.arange(start, stop + step / 2, step)]
+    return [float(s) for s in spec.split(",")]
+
+
+def sweep(mode, qs, ts, grid_n, out_dir, formats=("npy",), budget=None, scale=1.0, seeds_per_charge=0,
+          n_charges=CLOUD_CHARGES, theta=0.0):
+    """
+    Compute the field for every (q, t) and write each requested format under
+    out_dir. Returns one row per snapshot with its timings and file sizes.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    rows = []
+    for q in qs:
+        for t in (ts if mode in (DIPOLE, RADIATING) else [0.0]):
+            start = time.perf_counter()
+            field = compute_field(mode, q, grid_n, t, n_charges=n_charges, theta=theta)
+            if budget:
+                field = lod_sample(field, budget)
+            computed = time.perf_counter()
+
+            meta = {"mode": mode, "q": q, "t": t, "grid_n": grid_n, "budget": budget}
+            if mode == CLOUD:
+                meta.update(n_charges=n_charges, theta=theta)
+            stem = os.path.join(out_dir, f"q{q:+.2f}_t{t:.2f}_n{grid_n}")
+            written = {}
+            if "npy" in formats:
+                save_field(field, stem, meta)
+                written["npy"] = sum(os.path.getsize(os.path.join(stem, n)) for n in os.listdir(stem))
+            if "json" in formats:
+                with open(stem + ".json", "w", encoding="utf-8") as f:
+                    f.write(field_json(field, meta))
+                written["json"] = os.path.getsize(stem + ".json")
+            if "html" in formats or "png" in formats:
+                traced = seeds_per_charge and mode in (SINGLE, DIPOLE)
+                lines = trace_field_lines(charge_config(mode, q, t), seeds_per_charge) if traced else None
+                fig = build_figure(field, mode, q, (field["u"] * scale, field["v"] * scale, field["w"] * scale), lines)
+                if "html" in formats:
+                    fig.write_html(stem + ".html", include_plotlyjs="cdn")
+                    written["html"] = os.path.getsize(stem + ".html")
+                if "png" in formats:
+                    # Needs the optional kaleido package
+                    fig.write_image(stem + ".png")
+                    written["png"] = os.path.getsize(stem + ".png")
+
+            rows.append({"q": q, "t": t, "arrows": int(field["x"].size),
+                         "compute_s": computed - start, "write_s": time.perf_counter() - computed,
+                         "bytes": written})
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render field snapshots for a parameter sweep without Streamlit.")
+    parser.add_argument("--mode", choices=sorted(MODES), default="dipole")
+    parser.add_argument("--q", default="1.0", help='value, list "1,2" or range "start:stop:step"')
+    parser.add_argument("--t", default="0:6.2:0.4", help="time values (dipoles only), same syntax")
+    parser.add_argument("--grid", type=int, default=32)
+    parser.add_argument("--budget", type=int, help="level-of-detail arrow budget")
+    parser.add_argument("--scale", type=float, default=1.0, help="arrow scale for rendered figures")
+    parser.add_argument("--lines", type=int, default=0, help="field-line seeds per charge in rendered figures")
+    parser.add_argument("--charges", type=int, default=CLOUD_CHARGES, help="charge cloud size")
+    parser.add_argument("--theta", type=float, default=0.0, help="Barnes-Hut opening angle; 0 sums directly")
+    parser.add_argument("--format", action="append", choices=FORMATS, help="repeatable; default npy")
+    parser.add_argument("-o", "--out", default="snapshots")
+    args = parser.parse_args()
+
+    try:
+        rows = sweep(MODES[args.mode], parse_values(args.q), parse_values(args.t), args.grid, args.out,
+                     tuple(args.format or ["npy"]), args.budget, args.scale, args.lines, args.charges, args.theta)
+    except (ImportError, ValueError, RuntimeError) as e:
+        sys.exit(f"error: {e}")
+    for row in rows:
+        sizes = ", ".join(f"{k} {v / 1024:.0f} KB" for k, v in row["bytes"].items())
+        print(f"q={row['q']:+.2f} t={row['t']:.2f}: {row['arrows']} arrows, "
+              f"compute {row['compute_s'] * 1000:.0f} ms, write {row['write_s'] * 1000:.0f} ms ({sizes})")
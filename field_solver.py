@@ -0,0 +1,882 @@
+import sys
+import time
+import threading
+import tracemalloc
+from functools import lru_cache
+from contextlib import contextmanager
+
+import numpy as np
+
+from profiling import stage
+
+K = 1.0
+R3_FLOOR = 1e-6
+# Upper bound on (grid points x charges) handled per chunk. A chunk works in
+# five scratch arrays of this size, so 1 << 20 caps them at ~40 MB in float64
+# and ~20 MB in float32.
+CHUNK_ELEMENTS = 1 << 20
+PRECISIONS = {"float64": np.float64, "float32": np.float32}
+
+
+# --- Buffers ---------------------------------------------------------------
+class Workspace:
+    """
+    Named scratch arrays of one dtype. A buffer is allocated the first time
+    its name is asked for and reused afterwards whenever it is big enough, so
+    repeated solves on the same grid allocate nothing but their results.
+    """
+
+    def __init__(self, dtype=np.float64):
+        self.dtype = np.dtype(dtype)
+        self._buffers = {}
+        self._grid = (None, None)
+
+    @property
+    def nbytes(self):
+        grid = self._grid[1] or ()
+        return sum(b.nbytes for b in self._buffers.values()) + sum(a.nbytes for a in grid)
+
+    def get(self, name, shape):
+        size = int(np.prod(shape))
+        flat = self._buffers.get(name)
+        if flat is None or flat.size < size:
+            flat = self._buffers[name] = np.empty(size, self.dtype)
+        return flat[:size].reshape(shape)
+
+    def grid(self, n, L=1.0):
+        """make_grid(n, L) in this dtype plus the mask of points outside MASK_RADIUS; kept for the last (n, L)."""
+        key, arrays = self._grid
+        if key != (n, L):
+            grid = make_grid(n, L)
+            mask = _outside_mask(grid)
+            arrays = (*(a.astype(self.dtype) for a in grid), mask)
+            self._grid = ((n, L), arrays)
+        return arrays
+
+
+# Streamlit runs every rerun on a fresh thread, so workspaces are pooled per
+# dtype rather than kept thread-local; concurrent solves each borrow their own.
+_POOL = {}
+_POOL_LOCK = threading.Lock()
+
+
+@contextmanager
+def borrowed_workspace(dtype):
+    name = np.dtype(dtype).name
+    with _POOL_LOCK:
+        free = _POOL.setdefault(name, [])
+        work = free.pop() if free else Workspace(dtype)
+    try:
+        yield work
+    finally:
+        with _POOL_LOCK:
+            free.append(work)
+
+
+def make_grid(n, L=1.0):
+    """Flattened coordinates of an n x n x n grid spanning [-L, L]."""
+    xs = np.linspace(-L, L, n)
+    X, Y, Z = np.meshgrid(xs, xs, xs, indexing="xy")
+    return X.ravel(), Y.ravel(), Z.ravel()
+
+
+def _outside_mask(grid):
+    return np.sqrt(sum(a*a for a in grid)) > MASK_RADIUS
+
+
+@lru_cache(maxsize=16)
+def arrow_count(n, L=1.0):
+    """Arrows compute_field returns on an n-grid: the points outside MASK_RADIUS."""
+    return int(np.count_nonzero(_outside_mask(make_grid(n, L))))
+
+
+def electric_field(qval, rx, ry, rz, pos):
+    """Coulomb field of a single point charge at pos."""
+    dx = rx - pos[0]
+    dy = ry - pos[1]
+    dz = rz - pos[2]
+
+    r3 = (dx*dx + dy*dy + dz*dz)**1.5
+    r3 = np.where(r3 < R3_FLOOR, R3_FLOOR, r3)
+
+    return K*qval*dx/r3, K*qval*dy/r3, K*qval*dz/r3
+
+
+def superposed_field(charges, rx, ry, rz, chunk_elements=CHUNK_ELEMENTS, out=None, work=None):
+    """
+    Superposed Coulomb field of many point charges.
+
+    charges is an (N, 4) array of (x, y, z, q) rows. The grid is processed in
+    blocks of points x charges so that temporaries never exceed
+    chunk_elements, however many charges there are. The arithmetic runs in
+    the grid's dtype (float32 grids stay float32); results go into out, three
+    arrays shaped like rx, if given, and scratch comes from work if given.
+    """
+    dtype = np.result_type(rx, ry, rz, np.float32)
+    charges = np.asarray(charges, dtype=dtype).reshape(-1, 4)
+    n_points = rx.size
+    if out is None:
+        out = tuple(np.zeros(n_points, dtype) for _ in range(3))
+    else:
+        for a in out:
+            a.fill(0.0)
+    Ex, Ey, Ez = out
+    if len(charges) == 0:
+        return Ex, Ey, Ez
+    if work is None:
+        work = Workspace(dtype)
+
+    cols = min(len(charges), chunk_elements)
+    rows = min(max(1, chunk_elements // cols), n_points)
+    for c0 in range(0, len(charges), cols):
+        cx, cy, cz, cq = (charges[c0:c0 + cols, i] for i in range(4))
+        kq = K * cq
+        for r0 in range(0, n_points, rows):
+            sl = slice(r0, r0 + rows)
+            shape = (min(rows, n_points - r0), len(cx))
+            dx, dy, dz, r3, sq = (work.get(name, shape) for name in ("dx", "dy", "dz", "r3", "sq"))
+            acc = work.get("acc", shape[:1])
+            np.subtract(rx[sl, None], cx, out=dx)
+            np.subtract(ry[sl, None], cy, out=dy)
+            np.subtract(rz[sl, None], cz, out=dz)
+
+            np.multiply(dx, dx, out=r3)
+            np.multiply(dy, dy, out=sq)
+            r3 += sq
+            np.multiply(dz, dz, out=sq)
+            r3 += sq
+            np.sqrt(r3, out=sq)
+            r3 *= sq
+            np.maximum(r3, R3_FLOOR, out=r3)
+            np.divide(kq, r3, out=r3)
+
+            for E, d in ((Ex, dx), (Ey, dy), (Ez, dz)):
+                np.einsum("ij,ij->i", d, r3, out=acc)
+                E[sl] += acc
+    return Ex, Ey, Ez
+
+
+# --- Barnes-Hut octree -----------------------------------------------------
+# A cell is summarized (total charge plus dipole moment about its |q|-weighted
+# centre) when size < theta * distance; theta = 0 opens every cell and
+# reproduces direct summation. Charges of both signs make a monopole alone
+# a poor summary, hence the dipole term; the error then falls off as theta^3.
+THETA = 0.5
+LEAF_SIZE = 16
+MAX_DEPTH = 16
+# Neighbouring grid points that walk the tree together, and points per
+# chunk of groups; the chunk bounds the (group, cell, point) arrays.
+GROUP_SIZE = 32
+TARGET_CHUNK = 2048
+
+
+def _spread_bits(v):
+    """Interleave two zero bits after each of the low 21 bits of v (uint64)."""
+    v = v & np.uint64(0x1FFFFF)
+    for shift, mask in ((32, 0x1F00000000FFFF), (16, 0x1F0000FF0000FF), (8, 0x100F00F00F00F00F),
+                        (4, 0x10C30C30C30C30C3), (2, 0x1249249249249249)):
+        v = (v | (v << np.uint64(shift))) & np.uint64(mask)
+    return v
+
+
+def _expand(starts, counts):
+    """Concatenated ranges [start, start + count) as one index array."""
+    total = int(counts.sum())
+    offsets = np.repeat(starts - (np.cumsum(counts) - counts), counts)
+    return offsets + np.arange(total)
+
+
+class Octree:
+    """
+    Barnes-Hut octree over (N, 4) charges. Sorting the charges along a
+    Morton curve makes every cell a contiguous run of them at every depth,
+    so a level is built with a few reductions instead of per-node Python.
+    Build once per charge distribution; field() can then be called for any
+    set of points and theta.
+    """
+
+    def __init__(self, charges, leaf_size=LEAF_SIZE, max_depth=MAX_DEPTH):
+        charges = np.asarray(charges, dtype=float).reshape(-1, 4)
+        lo = charges[:, :3].min(axis=0, initial=0.0)
+        span = max(float((charges[:, :3].max(axis=0, initial=0.0) - lo).max()), 1e-12)
+        cells = np.minimum((charges[:, :3] - lo) / span * 2**max_depth, 2**max_depth - 1).astype(np.uint64)
+        codes = _spread_bits(cells[:, 0]) | _spread_bits(cells[:, 1]) << np.uint64(1) \
+            | _spread_bits(cells[:, 2]) << np.uint64(2)
+        order = np.argsort(codes, kind="stable")
+        self.charges = charges[order]
+        codes = codes[order]
+        n_charges = len(charges)
+
+        pos, q = self.charges[:, :3], self.charges[:, 3]
+        absq = np.abs(q)
+        levels = []
+        for level in range(max_depth + 1):
+            prefix = codes >> np.uint64(3 * (max_depth - level))
+            starts = np.flatnonzero(np.r_[True, prefix[1:] != prefix[:-1]]) if n_charges else np.empty(0, int)
+            counts = np.diff(np.r_[starts, n_charges])
+            levels.append((level, prefix[starts], starts, counts))
+            if counts.size == 0 or counts.max() <= leaf_size:
+                break
+
+        start, count, size, leaf, first_child, n_children = [], [], [], [], [], []
+        offset = 0
+        for i, (level, prefixes, starts, counts) in enumerate(levels):
+            start.append(starts)
+            count.append(counts)
+            size.append(np.full(len(starts), span / 2**level))
+            last = i == len(levels) - 1
+            leaf.append(counts <= leaf_size if not last else np.ones(len(starts), bool))
+            offset += len(starts)
+            if last:
+                first_child.append(np.zeros(len(starts), int))
+                n_children.append(np.zeros(len(starts), int))
+            else:
+                parents = levels[i + 1][1] >> np.uint64(3)
+                lo_child = np.searchsorted(parents, prefixes, "left")
+                first_child.append(offset + lo_child)
+                n_children.append(np.searchsorted(parents, prefixes, "right") - lo_child)
+        self.start, self.count, self.size, self.leaf, self.first_child, self.n_children = (
+            np.concatenate(a) for a in (start, count, size, leaf, first_child, n_children))
+        self.depth = len(levels) - 1
+
+        # Moments of every cell, all levels at once through the concatenated starts
+        total = np.add.reduceat(q, self.start) if n_charges else np.empty(0)
+        weight = np.add.reduceat(absq, self.start) if n_charges else np.empty(0)
+        mean = np.add.reduceat(pos, self.start) / self.count[:, None] if n_charges else np.empty((0, 3))
+        weighted = np.add.reduceat(absq[:, None] * pos, self.start) if n_charges else np.empty((0, 3))
+        self.centre = np.where(weight[:, None] > 0, weighted / np.maximum(weight, 1e-300)[:, None], mean)
+        self.total = K * total
+        # Radius of each cell about its centre, for the opening test
+        owner = np.repeat(np.arange(len(self.start)), self.count)
+        spread = np.sqrt(((pos[_expand(self.start, self.count)] - self.centre[owner])**2).sum(axis=1))
+        self.radius = np.maximum.reduceat(spread, np.r_[0, np.cumsum(self.count)[:-1]]) if n_charges else np.empty(0)
+        moment = np.add.reduceat(q[:, None] * pos, self.start) if n_charges else np.empty((0, 3))
+        self.dipole = K * (moment - total[:, None] * self.centre)
+
+    def __len__(self):
+        return len(self.start)
+
+    def field(self, rx, ry, rz, theta=THETA, out=None):
+        """
+        Approximate superposed_field at the given points. Points are sorted
+        along a Morton curve and cut into groups of GROUP_SIZE neighbours;
+        each chunk of groups walks the tree breadth first as an array of
+        (group, cell) pairs. A cell far enough from every point of a group
+        adds its multipole field to the whole group, leaves are summed
+        directly and the remaining cells are replaced by their children.
+        """
+        dtype = np.result_type(rx, ry, rz, np.float32)
+        targets = np.stack((rx, ry, rz), axis=1).astype(float)
+        n_points = len(targets)
+        if out is None:
+            out = tuple(np.zeros(n_points, dtype) for _ in range(3))
+        if n_points == 0:
+            return out
+        if len(self) == 0:
+            for a in out:
+                a.fill(0.0)
+            return out
+
+        # Spatially compact groups; the last one is padded with its own last point
+        lo = targets.min(axis=0)
+        span = max(float((targets.max(axis=0) - lo).max()), 1e-12)
+        cells = np.minimum((targets - lo) / span * 1024, 1023).astype(np.uint64)
+        order = np.argsort(_spread_bits(cells[:, 0]) | _spread_bits(cells[:, 1]) << np.uint64(1)
+                           | _spread_bits(cells[:, 2]) << np.uint64(2), kind="stable")
+        order = np.r_[order, np.repeat(order[-1:], -n_points % GROUP_SIZE)]
+        groups = targets[order].reshape(-1, GROUP_SIZE, 3)
+        group_centre = groups.mean(axis=1)
+        group_radius = np.sqrt(((groups - group_centre[:, None, :])**2).sum(axis=2)).max(axis=1)
+
+        pos, q = self.charges[:, :3], K * self.charges[:, 3]
+        lanes = np.arange(GROUP_SIZE)
+        result = np.empty((3, len(order)))
+        per_chunk = max(1, TARGET_CHUNK // GROUP_SIZE)
+        for g0 in range(0, len(groups), per_chunk):
+            points = groups[g0:g0 + per_chunk]
+            m = len(points)
+            acc = np.zeros((3, m * GROUP_SIZE))
+            grp = np.arange(m)
+            cell = np.zeros(m, int)
+            while grp.size:
+                d = group_centre[g0 + grp] - self.centre[cell]
+                dist = np.sqrt(np.einsum("ij,ij->i", d, d))
+                # Every point of the group is at least dist - group radius away
+                far = self.radius[cell] < theta * (dist - group_radius[g0 + grp])
+                if far.any():
+                    cf = cell[far]
+                    D = points[grp[far]] - self.centre[cf][:, None, :]
+                    r2 = np.einsum("pgi,pgi->pg", D, D)
+                    inv3 = 1 / np.maximum(r2 ** 1.5, R3_FLOOR)
+                    p = self.dipole[cf][:, None, :]
+                    scale = (self.total[cf][:, None] + 3 * np.einsum("pgi,pgi->pg", D, p) / r2) * inv3
+                    E = D * scale[..., None] - p * inv3[..., None]
+                    slots = (grp[far][:, None] * GROUP_SIZE + lanes).ravel()
+                    for k in range(3):
+                        acc[k] += np.bincount(slots, E[..., k].ravel(), minlength=acc.shape[1])
+
+                near = ~far
+                leaf = near & self.leaf[cell]
+                if leaf.any():
+                    cells = cell[leaf]
+                    counts = self.count[cells]
+                    owner = np.repeat(grp[leaf], counts)
+                    src = _expand(self.start[cells], counts)
+                    D = points[owner] - pos[src][:, None, :]
+                    r3 = np.einsum("pgi,pgi->pg", D, D) ** 1.5
+                    w = q[src][:, None] / np.maximum(r3, R3_FLOOR)
+                    slots = (owner[:, None] * GROUP_SIZE + lanes).ravel()
+                    for k in range(3):
+                        acc[k] += np.bincount(slots, (D[..., k] * w).ravel(), minlength=acc.shape[1])
+
+                opened = near & ~self.leaf[cell]
+                cells = cell[opened]
+                counts = self.n_children[cells]
+                grp = np.repeat(grp[opened], counts)
+                cell = _expand(self.first_child[cells], counts)
+            result[:, g0 * GROUP_SIZE:(g0 + m) * GROUP_SIZE] = acc
+
+        for k in range(3):
+            out[k][order] = result[k]
+        return out
+
+# --- Visualizer pipeline ---------------------------------------------------
+SINGLE = "Single Point Charge"
+DIPOLE = "Dipole (Oscillating)"
+DIPOLE_SEP = 0.4
+RADIATING = "Dipole (Radiating)"
+CLOUD = "Charge Cloud"
+CLOUD_CHARGES = 10000
+# Direct summation manages about 5e7 (charge, point) pairs a second on one
+# core; past this many pairs interactive callers switch to the octree.
+DIRECT_MAX_PAIRS = 250_000_000
+MASK_RADIUS = 0.07
+# Weight every arrow gets regardless of field, so flat regions stay sampled
+LOD_FLOOR = 0.05
+
+
+def cloud_charges(n, L=1.0, seed=0, clusters=12):
+    """
+    A clumpy distribution of n charges: Gaussian clusters of one sign each,
+    with sizes and widths varying between clusters, total |q| of 1.
+    """
+    rng = np.random.default_rng(seed)
+    centres = rng.uniform(-0.7*L, 0.7*L, size=(clusters, 3))
+    widths = rng.uniform(0.03, 0.2, size=clusters) * L
+    signs = np.where(np.arange(clusters) % 2, -1.0, 1.0)
+    member = rng.choice(clusters, size=n, p=rng.dirichlet(np.ones(clusters)))
+    charges = np.empty((n, 4))
+    charges[:, :3] = np.clip(centres[member] + rng.normal(size=(n, 3)) * widths[member, None], -L, L)
+    charges[:, 3] = signs[member] * rng.uniform(0.5, 1.0, size=n)
+    charges[:, 3] /= max(np.abs(charges[:, 3]).sum(), 1e-12)
+    return charges
+
+
+def charge_config(mode, q, t, n_charges=CLOUD_CHARGES):
+    """(N, 4) charges array for a visualizer mode."""
+    if mode == SINGLE:
+        return np.array([[0.0, 0.0, 0.0, q]])
+    if mode == CLOUD:
+        charges = cloud_charges(n_charges)
+        charges[:, 3] *= q
+        return charges
+    q1 = q * np.sin(t)
+    return np.array([[-DIPOLE_SEP/2, 0.0, 0.0, q1], [DIPOLE_SEP/2, 0.0, 0.0, -q1]])
+
+
+def _gradient(f, axis, h, out):
+    """np.gradient(f, h, axis=axis) (edge_order=1) written into out."""
+    def at(s):
+        index = [slice(None)] * f.ndim
+        index[axis] = s
+        return tuple(index)
+
+    inner, first, last = at(slice(1, -1)), at(slice(0, 1)), at(slice(-1, None))
+    np.subtract(f[at(slice(2, None))], f[at(slice(None, -2))], out=out[inner])
+    out[inner] *= 0.5 / h
+    np.subtract(f[at(slice(1, 2))], f[first], out=out[first])
+    np.subtract(f[last], f[at(slice(-2, -1))], out=out[last])
+    out[first] /= h
+    out[last] /= h
+    return out
+
+
+def _add_detail(capped, h, grad, detail):
+    """Add the squared gradient of every component of capped (C, n, n, n) along all axes to detail."""
+    for axis in (1, 2, 3):
+        np.square(_gradient(capped, axis, h, grad), out=grad)
+        for component in grad:
+            detail += component
+
+
+def compute_field(mode, q, grid_n, t, L=1.0, dtype=np.float64, work=None, n_charges=CLOUD_CHARGES, theta=0.0):
+    """
+    Everything the visualizer draws that does not depend on cosmetic
+    controls: masked grid points and field vectors normalized by the 95th
+    percentile magnitude. Multiply u/v/w by the arrow scale to plot.
+
+    "strength" (normalized magnitude capped at 1) and "detail" (how fast the
+    capped field changes between neighbouring grid points) drive lod_sample.
+
+    The whole pipeline runs in dtype (a PRECISIONS value) inside reusable
+    buffers from work, or from a pooled workspace; only the returned masked
+    arrays are newly allocated.
+
+    theta > 0 sums the charges with a Barnes-Hut Octree instead of directly;
+    n_charges sizes the charge cloud.
+    """
+    if mode == RADIATING:
+        frames = compute_radiation(q, grid_n, [t], L, dtype)
+        return {k: v[0] if k in FRAME_ARRAYS else v for k, v in frames.items()}
+    if work is None:
+        with borrowed_workspace(dtype) as work:
+            return compute_field(mode, q, grid_n, t, L, dtype, work, n_charges, theta)
+
+    n = int(grid_n)
+    with stage("grid"):
+        x, y, z, mask = work.grid(n, L)
+        charges = charge_config(mode, q, t, n_charges)
+    E = work.get("E", (3, x.size))
+    if theta > 0:
+        with stage("tree_build"):
+            tree = Octree(charges)
+        with stage("tree_walk"):
+            tree.field(x, y, z, theta, out=E)
+    else:
+        with stage("solve"):
+            superposed_field(charges, x, y, z, out=E, work=work)
+
+    with stage("percentile"):
+        mag = work.get("mag", x.shape)
+        np.einsum("ij,ij->j", E, E, out=mag)
+        np.sqrt(mag, out=mag)
+        mag_max = max(float(np.percentile(mag, 95)), 1e-6)
+
+    # Capping the magnitude keeps the singularity at each charge from
+    # swamping the gradient everywhere else.
+    with stage("detail"):
+        capped = work.get("capped", E.shape)
+        np.divide(E, np.maximum(mag, mag_max, out=work.get("cap", x.shape)), out=capped)
+        capped = capped.reshape(3, n, n, n)
+        grad = work.get("grad", capped.shape)
+        detail = work.get("detail", (n, n, n))
+        detail.fill(0.0)
+        _add_detail(capped, 2*L / (n - 1), grad, detail)
+        np.sqrt(detail, out=detail)
+
+    with stage("mask"):
+        # mag becomes strength in place
+        mag /= mag_max
+        np.minimum(mag, 1.0, out=mag)
+
+        field = {"charges": charges, "x": x[mask], "y": y[mask], "z": z[mask],
+                 "strength": mag[mask], "detail": detail.ravel()[mask]}
+        for name, component in zip("uvw", E):
+            field[name] = component[mask]
+            field[name] /= mag_max
+    return field
+
+
+def lod_sample(field, budget, seed=0):
+    """
+    Keep at most budget arrows of a compute_field result, sampled without
+    replacement with probability weighted towards strong and fast-changing
+    field. A fixed seed keeps the chosen points stable across reruns.
+    """
+    n_points = field["x"].size
+    if budget >= n_points:
+        return field
+
+    detail = field["detail"]
+    weight = field["strength"] + detail / max(detail.max(), 1e-12) + LOD_FLOOR
+    # Efraimidis-Spirakis weighted sampling: the top-k of u ** (1 / w)
+    keys = np.random.default_rng(seed).random(n_points) ** (1.0 / weight)
+    keep = np.sort(np.argpartition(keys, n_points - budget)[n_points - budget:])
+    return {
+        k: v[keep] if isinstance(v, np.ndarray) and v.shape == (n_points,) else v
+        for k, v in field.items()
+    }
+
+
+# --- Radiating dipole ------------------------------------------------------
+# The oscillating charge pair as an ideal (Hertzian) point dipole at the
+# origin, p(t) = q * DIPOLE_SEP * sin(omega t) along DIPOLE_AXIS, with fields
+# taken at the retarded time t - r / c. DIPOLE_AXIS points from the pair's
+# negative to its positive charge at t = pi / 2. WAVE_SPEED sets the
+# wavelength 2 pi c / omega; at 0.5 a bit over one and a half wavelengths fit
+# across the [-1, 1] box, so near, intermediate and radiation zones all show.
+DIPOLE_AXIS = np.array([-1.0, 0.0, 0.0])
+WAVE_SPEED = 0.5
+# Per-frame arrays of compute_radiation, shaped (T, N)
+FRAME_ARRAYS = ("u", "v", "w", "bu", "bv", "bw")
+
+
+def radiation_phasors(q, rx, ry, rz, c=WAVE_SPEED, omega=1.0):
+    """
+    Spatial parts of the radiating dipole's fields. Writing the retarded
+    phase as omega t - k r splits every field into
+        E(t) = sin(omega t) * Es + cos(omega t) * Ec
+    and likewise B, so (Es, Ec, Bs, Bc), each (3, N), fix it for all t.
+    """
+    dtype = np.result_type(rx, ry, rz, np.float32)
+    axis = DIPOLE_AXIS.astype(dtype)
+    p0 = K * q * DIPOLE_SEP
+    r = np.sqrt(rx*rx + ry*ry + rz*rz)
+    np.maximum(r, R3_FLOOR ** (1 / 3), out=r)
+    rhat = np.stack((rx, ry, rz)) / r
+    along = axis @ rhat
+
+    # Static (1/r^3), induction (1/r^2) and radiation (1/r) terms
+    near = 3 * rhat * along - axis[:, None]
+    far = rhat * along - axis[:, None]
+    swirl = np.cross(axis, rhat, axisb=0, axisc=0)
+    phase = (omega / c) * r
+    cos, sin = np.cos(phase), np.sin(phase)
+    inv1, k = 1 / r, omega / c
+    inv2 = inv1 * inv1
+    inv3 = inv2 * inv1
+
+    Es = p0 * (near * (cos*inv3 + k*sin*inv2) - far * (k*k*cos*inv1))
+    Ec = p0 * (near * (k*cos*inv2 - sin*inv3) + far * (k*k*sin*inv1))
+    Bs = (p0 / (c*c)) * swirl * (omega*sin*inv2 - omega*k*cos*inv1)
+    Bc = (p0 / (c*c)) * swirl * (omega*cos*inv2 + omega*k*sin*inv1)
+    return Es, Ec, Bs, Bc
+
+
+def phasor_frames(ts, sin_part, cos_part, omega=1.0):
+    """sin(omega t) * sin_part + cos(omega t) * cos_part for every t: (..., N) parts give (..., T, N)."""
+    wt = omega * np.asarray(ts, dtype=sin_part.dtype)
+    weights = np.stack((np.sin(wt), np.cos(wt)), axis=1)
+    return weights @ np.stack((sin_part, cos_part), axis=-2)
+
+
+def radiating_field(q, ts, rx, ry, rz, c=WAVE_SPEED, omega=1.0):
+    """
+    Retarded E and B of the radiating dipole at every time in ts, as two
+    (3, T, N) arrays from one vectorized call.
+    """
+    Es, Ec, Bs, Bc = radiation_phasors(q, rx, ry, rz, c, omega)
+    return phasor_frames(ts, Es, Ec, omega), phasor_frames(ts, Bs, Bc, omega)
+
+
+def radiating_field_frame(q, t, rx, ry, rz, c=WAVE_SPEED, omega=1.0):
+    """
+    The same fields at a single t, evaluated directly from p, p' and p'' at
+    each point's retarded time. The per-frame reference for radiating_field.
+    """
+    axis = DIPOLE_AXIS
+    p0 = K * q * DIPOLE_SEP
+    r = np.maximum(np.sqrt(rx*rx + ry*ry + rz*rz), R3_FLOOR ** (1 / 3))
+    rhat = np.stack((rx, ry, rz)) / r
+    along = axis @ rhat
+
+    retarded = omega * (t - r / c)
+    p = p0 * np.sin(retarded)
+    p_dot = p0 * omega * np.cos(retarded)
+    p_ddot = -p0 * omega * omega * np.sin(retarded)
+
+    E = ((3 * rhat * along - axis[:, None]) * (p / r**3 + p_dot / (c * r**2))
+         + (rhat * along - axis[:, None]) * (p_ddot / (c*c * r)))
+    B = np.cross(axis, rhat, axisb=0, axisc=0) * (p_dot / r**2 + p_ddot / (c * r)) / (c*c)
+    return E, B
+
+
+def compute_radiation(q, grid_n, ts, L=1.0, dtype=np.float64, c=WAVE_SPEED, budget=None):
+    """
+    compute_field for the radiating dipole over a vector of times: u/v/w (E)
+    and bu/bv/bw (B) are (T, N) arrays, each normalized by the 95th
+    percentile of its field's amplitude over a period, so arrow length
+    follows the wave. "strength" and "detail" are taken from the phasors and
+    hold for every t; with a budget, lod_sample runs before frames are
+    expanded, so only the kept points are evaluated per frame.
+    """
+    n = int(grid_n)
+    with borrowed_workspace(dtype) as work:
+        with stage("grid"):
+            x, y, z, mask = work.grid(n, L)
+        with stage("phasors"):
+            Es, Ec, Bs, Bc = radiation_phasors(q, x, y, z, c)
+
+        amplitude = np.sqrt(np.einsum("ij,ij->j", Es, Es) + np.einsum("ij,ij->j", Ec, Ec))
+        e_max = max(float(np.percentile(amplitude, 95)), 1e-6)
+        b_amplitude = np.sqrt(np.einsum("ij,ij->j", Bs, Bs) + np.einsum("ij,ij->j", Bc, Bc))
+        b_max = max(float(np.percentile(b_amplitude, 95)), 1e-6)
+
+        with stage("detail"):
+            capped = np.concatenate((Es, Ec)) / np.maximum(amplitude, e_max)
+            capped = capped.reshape(6, n, n, n)
+            detail = np.zeros((n, n, n), dtype=capped.dtype)
+            _add_detail(capped, 2*L / (n - 1), np.empty_like(capped), detail)
+            np.sqrt(detail, out=detail)
+
+        field = {
+            "charges": charge_config(DIPOLE, q, np.pi / 2),
+            "x": x[mask], "y": y[mask], "z": z[mask],
+            "strength": np.minimum(amplitude[mask] / e_max, 1.0), "detail": detail.ravel()[mask],
+            "Es": Es[:, mask] / e_max, "Ec": Ec[:, mask] / e_max,
+            "Bs": Bs[:, mask] / b_max, "Bc": Bc[:, mask] / b_max,
+        }
+    if budget:
+        n_points = field["x"].size
+        keep = lod_sample({**field, "index": np.arange(n_points)}, budget)["index"]
+        field = {k: v[..., keep] if isinstance(v, np.ndarray) and v.shape[-1:] == (n_points,) else v
+                 for k, v in field.items()}
+
+    with stage("frames"):
+        E = phasor_frames(ts, field.pop("Es"), field.pop("Ec"))
+        B = phasor_frames(ts, field.pop("Bs"), field.pop("Bc"))
+    field.update(zip(FRAME_ARRAYS, (*E, *B)))
+    field["t"] = [float(t) for t in ts]
+    return field
+
+
+# --- Field lines -----------------------------------------------------------
+def seed_points(charges, per_charge=24, radius=0.05):
+    """
+    Evenly spread seeds (Fibonacci sphere) around every non-zero charge.
+    Returns seeds (S, 3) and the integration direction of each seed: +1 to
+    follow E away from positive charges, -1 to run against it away from
+    negative ones.
+    """
+    charges = np.asarray(charges, dtype=float).reshape(-1, 4)
+    charges = charges[charges[:, 3] != 0.0]
+    k = np.arange(per_charge) + 0.5
+    polar = np.arccos(1.0 - 2.0 * k / per_charge)
+    azimuth = np.pi * (1.0 + 5**0.5) * k
+    sphere = np.stack((np.sin(polar) * np.cos(azimuth),
+                       np.sin(polar) * np.sin(azimuth),
+                       np.cos(polar)), axis=1) * radius
+
+    seeds = (charges[:, None, :3] + sphere[None, :, :]).reshape(-1, 3)
+    direction = np.repeat(np.sign(charges[:, 3]), per_charge)
+    return seeds, direction
+
+
+def trace_field_lines(charges, per_charge=24, step=0.02, max_steps=300, L=1.0, stop_radius=0.03):
+    """
+    Integrate field lines from seeds around each charge with a fixed-step
+    RK4 along the unit field direction. All live seeds advance together as
+    one array; a line stops when it leaves the [-L, L] box or comes within
+    stop_radius of a charge.
+
+    Returns flattened x, y, z arrays with a NaN between lines, ready for a
+    single Scatter3d trace.
+    """
+    charges = np.asarray(charges, dtype=float).reshape(-1, 4)
+    seeds, direction = seed_points(charges, per_charge)
+    n_seeds = len(seeds)
+    if n_seeds == 0:
+        return np.empty(0), np.empty(0), np.empty(0)
+    lines = np.full((max_steps + 1, n_seeds, 3), np.nan)
+
+    def tangent(p, sign):
+        Ex, Ey, Ez = superposed_field(charges, p[:, 0], p[:, 1], p[:, 2])
+        E = np.stack((Ex, Ey, Ez), axis=1)
+        norm = np.linalg.norm(E, axis=1, keepdims=True)
+        return E * (sign[:, None] / np.maximum(norm, 1e-12))
+
+    pos = seeds.copy()
+    lines[0] = pos
+    alive = np.arange(n_seeds)
+    for i in range(1, max_steps + 1):
+        p, sign = pos[alive], direction[alive]
+        k1 = tangent(p, sign)
+        k2 = tangent(p + 0.5*step*k1, sign)
+        k3 = tangent(p + 0.5*step*k2, sign)
+        k4 = tangent(p + step*k3, sign)
+        p = p + (step / 6.0) * (k1 + 2*k2 + 2*k3 + k4)
+        pos[alive] = p
+        lines[i, alive] = p
+
+        inside = np.all(np.abs(p) <= L, axis=1)
+        d2 = ((p[:, None, :] - charges[None, :, :3])**2).sum(axis=2)
+        clear = np.all(d2 > stop_radius**2, axis=1)
+        alive = alive[inside & clear]
+        if alive.size == 0:
+            break
+
+    # (seeds, steps, 3) with one NaN row closing each line; drop the rest
+    per_seed = np.concatenate((lines.transpose(1, 0, 2), np.full((n_seeds, 1, 3), np.nan)), axis=1)
+    valid = ~np.isnan(per_seed[:, :, 0])
+    separator = np.zeros_like(valid)
+    separator[:, 1:] = valid[:, :-1] & ~valid[:, 1:]
+    points = per_seed[valid | separator]
+    return points[:, 0], points[:, 1], points[:, 2]
+
+
+# --- Benchmark -------------------------------------------------------------
+def random_charges(n, L=1.0, seed=0):
+    rng = np.random.default_rng(seed)
+    charges = np.empty((n, 4))
+    charges[:, :3] = rng.uniform(-L, L, size=(n, 3))
+    charges[:, 3] = rng.uniform(-1.0, 1.0, size=n)
+    return charges
+
+
+def benchmark(grid_sizes=(16, 32, 48, 64), charge_counts=(2, 100, 1000), repeat=3):
+    """Time superposed_field and return one row per (grid_n, charges)."""
+    rows = []
+    for grid_n in grid_sizes:
+        x, y, z = make_grid(grid_n)
+        for n_charges in charge_counts:
+            charges = random_charges(n_charges)
+            best = float("inf")
+            for _ in range(repeat):
+                start = time.perf_counter()
+                superposed_field(charges, x, y, z)
+                best = min(best, time.perf_counter() - start)
+            pairs = x.size * n_charges
+            rows.append({
+                "grid_n": grid_n,
+                "charges": n_charges,
+                "seconds": best,
+                "pairs_per_sec": pairs / best if best > 0 else float("inf"),
+            })
+    return rows
+
+
+def profile_precision(grid_sizes=(32, 48, 64), mode=DIPOLE, q=1.0, t=1.0, repeat=3, **options):
+    """
+    Time compute_field in every precision and measure its peak traced memory
+    on a warm workspace. One row per (grid_n, precision); "max_error" is the
+    largest deviation of u/v/w from float64 relative to the largest vector.
+    options (n_charges, theta) are passed on to compute_field.
+    """
+    rows = []
+    for grid_n in grid_sizes:
+        reference = None
+        for name, dtype in PRECISIONS.items():
+            work = Workspace(dtype)
+            field = compute_field(mode, q, grid_n, t, dtype=dtype, work=work, **options)
+            best = float("inf")
+            for _ in range(repeat):
+                start = time.perf_counter()
+                compute_field(mode, q, grid_n, t, dtype=dtype, work=work, **options)
+                best = min(best, time.perf_counter() - start)
+
+            tracing = tracemalloc.is_tracing()
+            if not tracing:
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+            compute_field(mode, q, grid_n, t, dtype=dtype, work=work, **options)
+            peak = tracemalloc.get_traced_memory()[1] - base
+            if not tracing:
+                tracemalloc.stop()
+
+            vectors = np.stack([field[k] for k in "uvw"]).astype(np.float64)
+            if reference is None:
+                reference = vectors
+            scale = max(np.abs(reference).max(), 1e-12)
+            rows.append({
+                "grid_n": grid_n,
+                "precision": name,
+                "seconds": best,
+                "peak_bytes": peak,
+                "workspace_bytes": work.nbytes,
+                "max_error": float(np.abs(vectors - reference).max() / scale),
+            })
+    return rows
+
+
+def benchmark_radiation(grid_n=32, n_frames=63, repeat=3, q=1.0):
+    """
+    A full period of the radiating dipole on a grid_n grid: one
+    radiating_field call over all frames against radiating_field_frame per
+    frame. "max_error" is relative to the largest per-frame E vector.
+    """
+    x, y, z = make_grid(grid_n)
+    ts = np.linspace(0.0, 2 * np.pi, n_frames, endpoint=False)
+    timings = {}
+    for name, run in (("vectorized", lambda: radiating_field(q, ts, x, y, z)),
+                      ("per_frame", lambda: [radiating_field_frame(q, t, x, y, z) for t in ts])):
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = run()
+            best = min(best, time.perf_counter() - start)
+        timings[name] = (best, result)
+
+    E = timings["vectorized"][1][0]
+    E_ref = np.stack([frame[0] for frame in timings["per_frame"][1]], axis=1)
+    error = float(np.abs(E - E_ref).max() / max(np.abs(E_ref).max(), 1e-12))
+    return [{
+        "method": name,
+        "grid_n": grid_n,
+        "frames": n_frames,
+        "seconds": seconds,
+        "speedup": timings["per_frame"][0] / seconds if seconds > 0 else float("inf"),
+        "max_error": error,
+    } for name, (seconds, _) in timings.items()]
+
+
+def benchmark_tree(grid_sizes=(16, 32, 48), n_charges=20000, thetas=(0.3, 0.5, 0.8), charges=None):
+    """
+    Octree.field against superposed_field on cloud_charges (or the given
+    charges). One row per (grid_n, theta) with both timings, the tree build
+    time, the speedup and the error relative to direct summation: over the
+    whole grid ("rms_error") and per point (median and 99th percentile).
+    """
+    charges = cloud_charges(n_charges) if charges is None else charges
+    start = time.perf_counter()
+    tree = Octree(charges)
+    build = time.perf_counter() - start
+    rows = []
+    for grid_n in grid_sizes:
+        x, y, z = make_grid(grid_n)
+        start = time.perf_counter()
+        direct = np.array(superposed_field(charges, x, y, z))
+        direct_s = time.perf_counter() - start
+        norm = np.maximum(np.linalg.norm(direct, axis=0), 1e-300)
+        for theta in thetas:
+            start = time.perf_counter()
+            approx = np.array(tree.field(x, y, z, theta))
+            tree_s = time.perf_counter() - start
+            error = np.linalg.norm(approx - direct, axis=0)
+            rows.append({
+                "grid_n": grid_n,
+                "charges": len(charges),
+                "theta": theta,
+                "direct_s": direct_s,
+                "tree_s": tree_s,
+                "build_s": build,
+                "speedup": direct_s / (tree_s + build),
+                "rms_error": float(np.linalg.norm(error) / max(np.linalg.norm(direct), 1e-300)),
+                "median_error": float(np.median(error / norm)),
+                "p99_error": float(np.percentile(error / norm, 99)),
+            })
+    return rows
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["precision"]:
+        grids = tuple(int(a) for a in sys.argv[2:]) or (32, 48, 64)
+        print(f"{'grid_n':>6} {'precision':>9} {'ms':>8} {'peak MB':>8} {'buffers MB':>10} {'max err':>9}")
+        for row in profile_precision(grids):
+            print(f"{row['grid_n']:>6} {row['precision']:>9} {row['seconds'] * 1000:>8.1f} "
+                  f"{row['peak_bytes'] / 1e6:>8.1f} {row['workspace_bytes'] / 1e6:>10.1f} {row['max_error']:>9.1e}")
+        sys.exit()
+    if sys.argv[1:2] == ["radiation"]:
+        args = [int(a) for a in sys.argv[2:4]]
+        grid_n, n_frames = args + [32, 63][len(args):]
+        print(f"{'method':>10} {'grid_n':>6} {'frames':>6} {'ms':>8} {'speedup':>8} {'max err':>9}")
+        for row in benchmark_radiation(grid_n, n_frames):
+            print(f"{row['method']:>10} {row['grid_n']:>6} {row['frames']:>6} {row['seconds'] * 1000:>8.1f} "
+                  f"{row['speedup']:>7.1f}x {row['max_error']:>9.1e}")
+        sys.exit()
+
+    if sys.argv[1:2] == ["tree"]:
+        n_charges = int(sys.argv[2]) if len(sys.argv) > 2 else 20000
+        grids = tuple(int(a) for a in sys.argv[3:]) or (16, 32, 48)
+        print(f"{'grid_n':>6} {'charges':>8} {'theta':>5} {'direct s':>9} {'tree s':>7} {'speedup':>8} "
+              f"{'rms err':>8} {'median':>8} {'p99':>8}")
+        for row in benchmark_tree(grids, n_charges):
+            print(f"{row['grid_n']:>6} {row['charges']:>8} {row['theta']:>5.1f} {row['direct_s']:>9.2f} "
+                  f"{row['tree_s']:>7.2f} {row['speedup']:>7.1f}x {row['rms_error']:>8.1e} "
+                  f"{row['median_error']:>8.1e} {row['p99_error']:>8.1e}")
+        sys.exit()
+
+    counts = tuple(int(a) for a in sys.argv[1:]) or (2, 100, 1000)
+    print(f"{'grid_n':>6} {'charges':>8} {'seconds':>9} {'pairs/s':>12}")
+    for row in benchmark(charge_counts=counts):
+        print(f"{row['grid_n']:>6} {row['charges']:>8} {row['seconds']:>9.4f} {row['pairs_per_sec']:>12.3e}")
@@ -0,0 +1,266 @@
+import os
+import time
+import uuid
+import queue
+import threading
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor, CancelledError
+from concurrent.futures.process import BrokenProcessPool
+
+import profiling
+from obfuscator import publish_download, simulate_obfuscation
+from project_build import build_project, is_archive
+from result_cache import cache_key
+
+MAX_WORKERS = int(os.environ.get("OBFUSCATOR_WORKERS", os.cpu_count() or 2))
+MAX_PENDING = int(os.environ.get("OBFUSCATOR_MAX_PENDING", 64))
+# Cancel markers; next to the app, not in the working directory
+JOBS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "jobs")
+# Recent (wait, run) latencies kept for the metrics readout
+LATENCY_WINDOW = 200
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "queued", "running", "done", "failed", "cancelled"
+FINISHED = (DONE, FAILED, CANCELLED)
+
+
+class QueueFullError(RuntimeError):
+    pass
+
+
+class JobCancelled(Exception):
+    pass
+
+
+# --- Worker side -----------------------------------------------------------
+# Set in each worker process by _init_worker; carries (job_id, event, payload)
+# back to the parent's event thread.
+_events = None
+
+
+def _init_worker(events):
+    global _events
+    _events = events
+
+
+def _run_job(job_id, input_path, output_path, params, cancel_marker):
+    started = time.time()
+    _events.put((job_id, "started", started))
+
+    def progress(fraction, stage):
+        # Running jobs are cancelled cooperatively between stages
+        if os.path.exists(cancel_marker):
+            raise JobCancelled(job_id)
+        _events.put((job_id, "progress", (fraction, stage)))
+
+    build = build_project if is_archive(input_path) else simulate_obfuscation
+    # Stage timings travel back with the result; the parent records them
+    with profiling.capture("job") as timing:
+        report, output_path = build(input_path, output_path, params, progress=progress)
+    return started, report, output_path, timing
+
+
+# --- Scheduler -------------------------------------------------------------
+class JobQueue:
+    """
+    Runs obfuscation jobs on a bounded process pool. Job records are plain
+    dicts kept in the parent process, so they survive Streamlit reruns as
+    long as the queue itself is shared (st.cache_resource).
+
+    With a ResultCache, a submission whose input bytes and normalized params
+    were processed before completes immediately from the cache. With a
+    profiling.Profiler, every finished job's stage timings and outcome are
+    recorded in it.
+    """
+
+    def __init__(self, max_workers=MAX_WORKERS, max_pending=MAX_PENDING, jobs_dir=JOBS_DIR, cache=None,
+                 profiler=None):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.jobs_dir = jobs_dir
+        self.cache = cache
+        self.profiler = profiler
+        os.makedirs(jobs_dir, exist_ok=True)
+
+        # spawn, not fork: the parent is a multi-threaded Streamlit server
+        self._ctx = mp.get_context("spawn")
+        self._events = self._ctx.Queue()
+        self._pool = self._new_pool()
+        self._jobs = {}
+        self._futures = {}
+        self._latencies = []
+        self._lock = threading.Lock()
+        threading.Thread(target=self._drain_events, daemon=True).start()
+
+    def submit(self, input_path, output_path, params):
+        key = cache_key(input_path, params) if self.cache else None
+        cached = self.cache.get(key, output_path) if self.cache else None
+        if cached is not None:
+            return self._complete_from_cache(key, output_path, params, cached)
+
+        with self._lock:
+            pending = sum(1 for job in self._jobs.values() if job["status"] in (QUEUED, RUNNING))
+            if pending >= self.max_pending:
+                raise QueueFullError(f"{pending} jobs pending; try again shortly")
+            job_id = uuid.uuid4().hex
+            args = (_run_job, job_id, input_path, output_path, params, self._cancel_marker(job_id))
+            try:
+                future = self._pool.submit(*args)
+            except BrokenProcessPool:
+                # A worker died (OOM kill, crash): the jobs it took down have
+                # failed, and everything after them gets a fresh pool
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = self._new_pool()
+                future = self._pool.submit(*args)
+            self._jobs[job_id] = self._record(job_id, key, output_path, params)
+            self._futures[job_id] = future
+        future.add_done_callback(lambda f: self._finish(job_id, f))
+        return job_id
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def cancel(self, job_id):
+        """Cancel a queued job outright; ask a running one to stop at its next stage."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job["status"] in FINISHED:
+                return False
+            future = self._futures[job_id]
+        # Outside the lock: a successful cancel() runs _finish synchronously
+        if not future.cancel():
+            open(self._cancel_marker(job_id), "w").close()
+        return True
+
+    def active_workspaces(self):
+        """Directories holding outputs of queued or running jobs."""
+        with self._lock:
+            return [os.path.dirname(job["output_path"]) for job in self._jobs.values()
+                    if job["status"] in (QUEUED, RUNNING)]
+
+    def prune(self):
+        """Forget finished jobs whose workspace has been reaped; returns how many."""
+        with self._lock:
+            gone = [job_id for job_id, job in self._jobs.items()
+                    if job["status"] in FINISHED and not os.path.exists(os.path.dirname(job["output_path"]))]
+            for job_id in gone:
+                del self._jobs[job_id]
+        return len(gone)
+
+    def metrics(self):
+        with self._lock:
+            statuses = [job["status"] for job in self._jobs.values()]
+            waits = sorted(w for w, _ in self._latencies)
+            runs = sorted(r for _, r in self._latencies)
+
+        def pct(values, p):
+            return values[min(len(values) - 1, int(p * len(values)))] if values else 0.0
+
+        return {
+            "queue_depth": statuses.count(QUEUED),
+            "running": statuses.count(RUNNING),
+            "done": statuses.count(DONE),
+            "failed": statuses.count(FAILED),
+            "cancelled": statuses.count(CANCELLED),
+            "wait_p50_s": pct(waits, 0.5),
+            "wait_p95_s": pct(waits, 0.95),
+            "run_p50_s": pct(runs, 0.5),
+            "run_p95_s": pct(runs, 0.95),
+        }
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    # --- internals ---
+    def _new_pool(self):
+        return ProcessPoolExecutor(self.max_workers, mp_context=self._ctx,
+                                   initializer=_init_worker, initargs=(self._events,))
+
+    def _record(self, job_id, key, output_path, params):
+        return {
+            "id": job_id,
+            "status": QUEUED,
+            "progress": 0.0,
+            "stage": "queued",
+            "submitted": time.time(),
+            "started": None,
+            "finished": None,
+            "params": params,
+            "output_path": output_path,
+            "cache_key": key,
+            "cache": "miss" if key else None,
+            "report": None,
+            "download_url": None,
+            "error": None,
+        }
+
+    def _complete_from_cache(self, key, output_path, params, report):
+        # The cached report describes the first submission; show this one's params
+        report["input_parameters"] = params
+        report["output_file_size"] = os.path.getsize(output_path)
+        job_id = uuid.uuid4().hex
+        job = self._record(job_id, key, output_path, params)
+        job.update(status=DONE, progress=1.0, stage="done", cache="hit", report=report,
+                   download_url=publish_download(output_path), finished=time.time())
+        with self._lock:
+            self._jobs[job_id] = job
+        if self.profiler:
+            self.profiler.count("job_cached")
+        return job_id
+
+    def _cancel_marker(self, job_id):
+        return os.path.join(self.jobs_dir, f"{job_id}.cancel")
+
+    def _drain_events(self):
+        while True:
+            try:
+                job_id, event, payload = self._events.get()
+            except (EOFError, OSError, queue.Empty):
+                return
+            with self._lock:
+                job = self._jobs.get(job_id)
+                if job is None or job["status"] in FINISHED:
+                    continue
+                if event == "started":
+                    job["status"], job["started"] = RUNNING, payload
+                elif event == "progress":
+                    job["progress"], job["stage"] = payload
+
+    def _finish(self, job_id, future):
+        url, report, error, status, started, timing = None, None, None, DONE, None, None
+        try:
+            started, report, output_path, timing = future.result()
+            with profiling.capture("publish") as published:
+                url = publish_download(output_path)
+            timing.add("publish", published.total)
+            if self.cache:
+                try:
+                    self.cache.put(self._jobs[job_id]["cache_key"], output_path, report)
+                except OSError:
+                    pass  # a failed cache write must not fail the job
+        except (CancelledError, JobCancelled):
+            status = CANCELLED
+        except Exception as e:
+            status, error = FAILED, str(e)
+
+        with self._lock:
+            job = self._jobs[job_id]
+            job.update(status=status, report=report, download_url=url, error=error, finished=time.time())
+            job["started"] = job["started"] or started
+            if status == DONE:
+                job["progress"], job["stage"] = 1.0, "done"
+            if job["started"] is not None:
+                self._latencies.append((job["started"] - job["submitted"], job["finished"] - job["started"]))
+                del self._latencies[:-LATENCY_WINDOW]
+            self._futures.pop(job_id, None)
+            submitted = job["submitted"]
+        if self.profiler:
+            if timing is not None:
+                timing.add("queued", max(0.0, started - submitted))
+                self.profiler.record(timing)
+            self.profiler.count(f"job_{status}")
+        try:
+            os.remove(self._cancel_marker(job_id))
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,124 @@
+import os
+import uuid
+import shutil
+import threading
+import http.server
+from urllib.parse import quote
+
+from profiling import stage
+from source_metrics import analyze_source
+
+# Uploads and outputs are moved in fixed-size chunks so a file is never held
+# in memory more than once (Streamlit already keeps the upload buffer).
+CHUNK_SIZE = 1024 * 1024
+
+# Outputs are published here for download. Streamlit serves the static/
+# folder next to the app script at app/static/ when
+# server.enableStaticServing is on (.streamlit/config.toml), streaming the
+# file from disk instead of embedding it in the page. Anchored to this file,
+# not the working directory, so `streamlit run /path/Suraksha2_0.py` works.
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+DOWNLOADS_DIR = os.path.join(STATIC_DIR, "downloads")
+# Streamlit's static handler answers 404 for files over 200 MB, so larger
+# outputs are streamed by serve_downloads() on a port of their own. Set
+# OBFUSCATOR_DOWNLOAD_URL to where browsers reach that port when the app is
+# not opened on localhost.
+STATIC_MAX_BYTES = 200 * 1024 * 1024
+DOWNLOAD_PORT = int(os.environ.get("OBFUSCATOR_DOWNLOAD_PORT", 8502))
+DOWNLOAD_URL = os.environ.get("OBFUSCATOR_DOWNLOAD_URL", f"http://localhost:{DOWNLOAD_PORT}")
+
+
+# --- Helpers ---------------------------------------------------------------
+def safe_filename(filename: str) -> str:
+    # Remove any path components
+    return os.path.basename(filename)
+
+def parse_custom_params(text: str) -> dict:
+    out = {}
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        if "=" in line:
+            k, v = line.split("=", 1)
+            out[k.strip()] = v.strip()
+        else:
+            out[line] = True
+    return out
+
+def save_upload(uploaded_file, dest_path, chunk_size=CHUNK_SIZE) -> int:
+    """Copy a file-like upload to dest_path in chunks; returns bytes written."""
+    uploaded_file.seek(0)
+    with open(dest_path, "wb") as f:
+        shutil.copyfileobj(uploaded_file, f, chunk_size)
+        return f.tell()
+
+def publish_download(path) -> str:
+    """
+    Expose path under DOWNLOADS_DIR without copying it when possible (hard
+    link) and return the URL it is served at: Streamlit's static handler,
+    or serve_downloads() past STATIC_MAX_BYTES. Each publish gets a random
+    directory so names cannot collide or be guessed.
+    """
+    token_dir = os.path.join(DOWNLOADS_DIR, uuid.uuid4().hex)
+    os.makedirs(token_dir, exist_ok=True)
+    published = os.path.join(token_dir, os.path.basename(path))
+    try:
+        os.link(path, published)
+    except OSError:
+        shutil.copyfile(path, published)
+    rel = quote(os.path.relpath(published, DOWNLOADS_DIR).replace(os.sep, "/"))
+    if os.path.getsize(published) > STATIC_MAX_BYTES:
+        return f"{DOWNLOAD_URL}/{rel}"
+    return f"app/static/downloads/{rel}"
+
+
+class _DownloadHandler(http.server.SimpleHTTPRequestHandler):
+    """Files under DOWNLOADS_DIR, streamed from disk; no directory listings."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, directory=DOWNLOADS_DIR, **kwargs)
+
+    def list_directory(self, path):
+        self.send_error(404)
+        return None
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_downloads(port=DOWNLOAD_PORT, host=""):
+    """Serve DOWNLOADS_DIR on port from a daemon thread; returns the server."""
+    os.makedirs(DOWNLOADS_DIR, exist_ok=True)
+    server = http.server.ThreadingHTTPServer((host, port), _DownloadHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def simulate_obfuscation(input_file_path, output_file_path, params, progress=None):
+    """
+    For prototype: copy file. Real implementation: run clang/llvm toolchain & passes.
+    progress, if given, is called as progress(fraction, stage) between stages.
+    """
+    if progress:
+        progress(0.0, "copying")
+    with stage("copy"):
+        shutil.copy(input_file_path, output_file_path)
+    if progress:
+        progress(0.5, "analyzing")
+    with stage("analyze"):
+        metrics = analyze_source(input_file_path)
+    if progress:
+        progress(0.9, "reporting")
+
+    report = {
+        "input_parameters": params,
+        "output_file_size": os.path.getsize(output_file_path),
+        "method_of_obfuscation": f"Simulated Obfuscation (Level: {params.get('obfuscation_level')})",
+        "bogus_code_generated": "Approximately 50 lines (simulated)",
+        "cycles_completed": 3,
+        # Every string literal is encrypted and every function gets one fake loop
+        "string_obfuscations": metrics["string_literals"],
+        "fake_loops_inserted": metrics["functions"],
+        "source_metrics": metrics,
+    }
+    return report, output_file_path
@@ -0,0 +1,287 @@
+import sys
+import json
+import asyncio
+import argparse
+
+import domain_reputation
+import email_scanner
+import url_index
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+# Requests arriving within BATCH_WINDOW of each other are scored together,
+# up to BATCH_MAX per batch, off the event loop.
+BATCH_MAX = 64
+BATCH_WINDOW = 0.002
+MAX_BODY = 10 * 1024 * 1024
+
+
+# --- Core ------------------------------------------------------------------
+# The Streamlit pages, the CLI and the HTTP service all score through these.
+def score_email(content, sender_placeholder="Not Found", seed=email_scanner.DEFAULT_SEED):
+    """Sender, indicators and score, plus the parsed headers and scored links."""
+    return email_scanner.analyze_message(content, sender_placeholder, seed=seed)
+
+
+def score_emails(contents):
+    return [score_email(content) for content in contents]
+
+
+def score_url(url):
+    return url_index.classify_url(url)
+
+
+def score_urls(urls):
+    return url_index.classify_urls(urls)
+
+
+def warm_up():
+    """Load the rules, keyword index and reputation store before serving."""
+    email_scanner.DEFAULT_RULESET
+    url_index.DEFAULT_INDEX
+    domain_reputation.get_store()
+
+
+# --- Batching --------------------------------------------------------------
+class Batcher:
+    """
+    Collects concurrent submissions and runs fn(items) -> results once per
+    batch in a worker thread, so the event loop keeps accepting requests
+    while a batch is being scored.
+    """
+
+    def __init__(self, fn, max_batch=BATCH_MAX, window=BATCH_WINDOW):
+        self.fn = fn
+        self.max_batch = max_batch
+        self.window = window
+        self.batches = 0
+        self.items = 0
+        self._queue = asyncio.Queue()
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._run())
+        return self
+
+    async def submit(self, item):
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((item, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.window
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            items = [item for item, _ in batch]
+            outcomes = await loop.run_in_executor(None, self._score, items)
+            self.batches += 1
+            self.items += len(items)
+            for (_, future), (result, error) in zip(batch, outcomes):
+                if future.done():
+                    continue
+                if error is None:
+                    future.set_result(result)
+                else:
+                    future.set_exception(error)
+
+    def _score(self, items):
+        """
+        (result, exception) per item. A batch that raises is rescored item by
+        item, so a bad input fails only its own request.
+        """
+        try:
+            return [(result, None) for result in self.fn(items)]
+        except Exception:
+            pass
+        outcomes = []
+        for item in items:
+            try:
+                outcomes.append((self.fn([item])[0], None))
+            except Exception as e:
+                outcomes.append((None, e))
+        return outcomes
+
+
+# --- HTTP ------------------------------------------------------------------
+class HttpError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+class PhishService:
+    """
+    Minimal HTTP/1.1 JSON service:
+
+        GET  /health
+        POST /email  {"content": "..."}  or  {"contents": ["...", ...]}
+        POST /url    {"url": "..."}      or  {"urls": ["...", ...]}
+    """
+
+    def __init__(self):
+        self.emails = None
+        self.urls = None
+
+    async def start(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        warm_up()
+        self.emails = Batcher(score_emails).start()
+        self.urls = Batcher(score_urls).start()
+        return await asyncio.start_server(self._handle_connection, host, port)
+
+    async def _handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request_line = await reader.readline()
+                except (asyncio.LimitOverrunError, ValueError):
+                    self._respond(writer, 400, {"error": "request line too long"}, False)
+                    await writer.drain()
+                    break
+                if not request_line.strip():
+                    break
+                keep_alive = await self._handle_request(request_line, reader, writer)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _handle_request(self, request_line, reader, writer):
+        headers = {}
+        while True:
+            try:
+                line = await reader.readline()
+            except (asyncio.LimitOverrunError, ValueError):
+                # readline gives up past the stream limit (64 KiB)
+                self._respond(writer, 400, {"error": "header line too long"}, False)
+                return False
+            if not line.strip():
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        try:
+            method, path, version = request_line.decode("latin-1").split()
+        except ValueError:
+            self._respond(writer, 400, {"error": "malformed request line"}, False)
+            return False
+        keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+
+        try:
+            length = int(headers.get("content-length", 0))
+            if length < 0:
+                raise ValueError(length)
+        except ValueError:
+            self._respond(writer, 400, {"error": "invalid Content-Length"}, False)
+            return False
+
+        try:
+            if length > MAX_BODY:
+                raise HttpError(413, f"body larger than {MAX_BODY} bytes")
+            body = await reader.readexactly(length) if length else b""
+            status, payload = 200, await self._route(method, path, body)
+        except HttpError as e:
+            status, payload = e.status, {"error": str(e)}
+            keep_alive = keep_alive and e.status != 413
+        except Exception as e:
+            status, payload = 500, {"error": str(e)}
+        self._respond(writer, status, payload, keep_alive)
+        return keep_alive
+
+    async def _route(self, method, path, body):
+        path = path.split("?", 1)[0]
+        if path == "/health":
+            if method != "GET":
+                raise HttpError(405, "use GET")
+            return {"status": "ok",
+                    "email_batches": self.emails.batches, "emails": self.emails.items,
+                    "url_batches": self.urls.batches, "urls": self.urls.items}
+        if path not in ("/email", "/url"):
+            raise HttpError(404, f"no such endpoint: {path}")
+        if method != "POST":
+            raise HttpError(405, "use POST")
+
+        try:
+            data = json.loads(body or b"{}")
+        except ValueError:
+            raise HttpError(400, "body must be JSON")
+        if not isinstance(data, dict):
+            raise HttpError(400, "body must be a JSON object")
+
+        one, many, batcher = ("content", "contents", self.emails) if path == "/email" else ("url", "urls", self.urls)
+        if isinstance(data.get(one), str):
+            return await batcher.submit(data[one])
+        items = data.get(many)
+        if isinstance(items, list) and all(isinstance(item, str) for item in items):
+            return {"results": await asyncio.gather(*(batcher.submit(item) for item in items))}
+        raise HttpError(400, f'expected "{one}": string or "{many}": [string, ...]')
+
+    def _respond(self, writer, status, payload, keep_alive):
+        body = json.dumps(payload).encode("utf-8")
+        head = (f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+                f"Content-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        writer.write(head.encode("latin-1") + body)
+
+
+async def serve(host=DEFAULT_HOST, port=DEFAULT_PORT):
+    server = await PhishService().start(host, port)
+    print(f"listening on http://{host}:{port}", file=sys.stderr)
+    async with server:
+        await server.serve_forever()
+
+
+# --- CLI -------------------------------------------------------------------
+def _print_jsonl(records):
+    for record in records:
+        print(json.dumps(record, ensure_ascii=False))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score emails and URLs for phishing without the UI.",
+                                     epilog="Set PHISH_SCORE_SEED for reproducible email scores.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    email_cmd = commands.add_parser("email", help="score .eml files, eml directories or mboxes (stdin if none)")
+    email_cmd.add_argument("paths", nargs="*")
+    url_cmd = commands.add_parser("url", help="score URLs (one per line on stdin if none)")
+    url_cmd.add_argument("urls", nargs="*")
+    serve_cmd = commands.add_parser("serve", help="run the JSON HTTP service")
+    serve_cmd.add_argument("--host", default=DEFAULT_HOST)
+    serve_cmd.add_argument("--port", type=int, default=DEFAULT_PORT)
+    args = parser.parse_args(argv)
+
+    if args.command == "email":
+        if not args.paths:
+            _print_jsonl([score_email(sys.stdin.read())])
+        for path in args.paths:
+            _print_jsonl({"id": msg_id, **score_email(raw)}
+                         for msg_id, raw in email_scanner.iter_messages(path))
+    elif args.command == "url":
+        urls = args.urls or [line.strip() for line in sys.stdin if line.strip()]
+        _print_jsonl(score_urls(urls))
+    else:
+        try:
+            asyncio.run(serve(args.host, args.port))
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
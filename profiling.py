@@ -0,0 +1,229 @@
+import os
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager, nullcontext
+
+# Histogram bucket upper bounds, in seconds
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+HISTORY = 20
+# The debug panel is opt-in: PROFILE_PANEL=1 streamlit run <app>.py
+PANEL_ENABLED = os.environ.get("PROFILE_PANEL", "") not in ("", "0")
+
+# The run being timed on this thread, if any. Library code calls stage()
+# unconditionally; outside a run it costs one attribute lookup.
+_local = threading.local()
+_NULL = nullcontext()
+
+
+# --- Runs and stages -------------------------------------------------------
+class Run:
+    """Stage timings of one rerun, request or job. Repeated stage names add up."""
+
+    def __init__(self, kind="rerun"):
+        self.kind = kind
+        self.started = time.time()
+        self.total = None
+        self.stages = {}
+        self._start = time.perf_counter()
+
+    def add(self, name, seconds):
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def finish(self):
+        self.total = time.perf_counter() - self._start
+
+
+class _Stage:
+    __slots__ = ("run", "name", "start")
+
+    def __init__(self, run, name):
+        self.run, self.name = run, name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.run.add(self.name, time.perf_counter() - self.start)
+        return False
+
+
+def stage(name):
+    """Time the enclosed block as stage `name` of the run active on this thread."""
+    run = getattr(_local, "run", None)
+    return _NULL if run is None else _Stage(run, name)
+
+
+def begin(kind="rerun"):
+    """
+    Start timing a run on this thread and return it; hand it to
+    Profiler.end() when done. Touches no Streamlit state, so it can come
+    before st.set_page_config. A run that never ends (st.stop, st.rerun) is
+    simply not recorded.
+    """
+    run = Run(kind)
+    _local.run = run
+    return run
+
+
+@contextmanager
+def capture(kind="rerun"):
+    """
+    Make a new Run the active one on this thread for the enclosed block and
+    yield it. Nothing is recorded; pass the run to Profiler.record, possibly
+    from another process (runs pickle).
+    """
+    run = Run(kind)
+    previous = getattr(_local, "run", None)
+    _local.run = run
+    try:
+        yield run
+    finally:
+        run.finish()
+        _local.run = previous
+
+
+# --- Aggregation -----------------------------------------------------------
+class _Histogram:
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self, n_buckets):
+        self.counts = [0] * n_buckets
+        self.sum = 0.0
+        self.count = 0
+
+
+class Profiler:
+    """
+    Per-app timing store shared by every session (keep one in
+    st.cache_resource). A Streamlit rerun is bracketed by begin() and end();
+    stages timed in between, here or in library code, feed one latency
+    histogram per stage, and the last `history` runs are kept whole for the
+    debug panel. Counters count anything else worth exporting.
+    """
+
+    def __init__(self, app, history=HISTORY, buckets=BUCKETS):
+        self.app = app
+        self.buckets = tuple(buckets)
+        self._runs = deque(maxlen=history)
+        self._stages = {}
+        self._totals = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def begin(self, kind="rerun"):
+        return begin(kind)
+
+    def end(self, run):
+        run.finish()
+        if getattr(_local, "run", None) is run:
+            _local.run = None
+        self.record(run)
+
+    @contextmanager
+    def run(self, kind="rerun"):
+        """Time the enclosed block as one run; it is recorded even if it raises."""
+        run = None
+        try:
+            with capture(kind) as run:
+                yield run
+        finally:
+            if run is not None:
+                self.record(run)
+
+    def record(self, run):
+        with self._lock:
+            self._runs.append(run)
+            for name, seconds in run.stages.items():
+                self._observe(self._stages, (run.kind, name), seconds)
+            if run.total is not None:
+                self._observe(self._totals, run.kind, run.total)
+
+    def count(self, name, value=1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def recent(self):
+        """The kept runs, newest first, as plain dicts."""
+        with self._lock:
+            runs = list(self._runs)
+        return [{"kind": r.kind, "started": r.started, "total": r.total, "stages": dict(r.stages)}
+                for r in reversed(runs)]
+
+    def summary(self):
+        """{(kind, stage): (count, total seconds)} over every recorded run."""
+        with self._lock:
+            return {key: (h.count, h.sum) for key, h in self._stages.items()}
+
+    def _observe(self, table, key, seconds):
+        hist = table.get(key)
+        if hist is None:
+            hist = table[key] = _Histogram(len(self.buckets))
+        for i, bound in enumerate(self.buckets):
+            if seconds <= bound:
+                hist.counts[i] += 1
+                break
+        hist.sum += seconds
+        hist.count += 1
+
+    # --- Export ---
+    def prometheus(self):
+        """Counters and histograms in the Prometheus text exposition format."""
+        app = _label(self.app)
+        lines = []
+        with self._lock:
+            for metric, help_text, table, label in (
+                ("pipeline_stage_seconds", "Time spent in named pipeline stages.", self._stages,
+                 lambda key: f'app="{app}",kind="{_label(key[0])}",stage="{_label(key[1])}"'),
+                ("pipeline_run_seconds", "Wall time of whole runs.", self._totals,
+                 lambda key: f'app="{app}",kind="{_label(key)}"'),
+            ):
+                lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} histogram"]
+                for key, hist in sorted(table.items()):
+                    labels = label(key)
+                    cumulative = 0
+                    for bound, n in zip(self.buckets, hist.counts):
+                        cumulative += n
+                        lines.append(f'{metric}_bucket{{{labels},le="{bound:g}"}} {cumulative}')
+                    lines.append(f'{metric}_bucket{{{labels},le="+Inf"}} {hist.count}')
+                    lines.append(f"{metric}_sum{{{labels}}} {hist.sum:.6f}")
+                    lines.append(f"{metric}_count{{{labels}}} {hist.count}")
+
+            lines += ["# HELP pipeline_events_total Counted pipeline events.",
+                      "# TYPE pipeline_events_total counter"]
+            for name, value in sorted(self._counters.items()):
+                lines.append(f'pipeline_events_total{{app="{app}",event="{_label(name)}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+# --- Debug panel -----------------------------------------------------------
+def debug_panel(profiler, container):
+    """
+    Last runs with their stage breakdown, per-stage totals and the metrics
+    text, drawn into a Streamlit container (st.sidebar, a column, ...).
+    """
+    runs = profiler.recent()
+    panel = container.expander(f"Profiling (last {len(runs)} runs)")
+    with panel:
+        if not runs:
+            panel.write("No runs recorded yet.")
+            return
+        stages = list(dict.fromkeys(name for run in runs for name in run["stages"]))
+        panel.table([
+            {"kind": run["kind"],
+             "started": time.strftime("%H:%M:%S", time.localtime(run["started"])),
+             "total ms": f"{run['total'] * 1000:.1f}" if run["total"] is not None else "",
+             **{name: f"{run['stages'][name] * 1000:.1f}" if name in run["stages"] else "" for name in stages}}
+            for run in runs
+        ])
+        panel.table([
+            {"kind": kind, "stage": name, "count": count, "mean ms": f"{total / count * 1000:.2f}"}
+            for (kind, name), (count, total) in sorted(profiler.summary().items())
+        ])
+        panel.download_button("Metrics (Prometheus text)", profiler.prometheus(),
+                              file_name=f"{profiler.app}_metrics.prom", mime="text/plain")
@@ -0,0 +1,228 @@
+import os
+import re
+import json
+import time
+import uuid
+import shutil
+import hashlib
+import tarfile
+import zipfile
+import itertools
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from obfuscator import CHUNK_SIZE, simulate_obfuscation
+from profiling import stage
+from result_cache import normalize_params
+
+ARCHIVE_SUFFIXES = (".zip", ".tar", ".tar.gz", ".tgz")
+UNIT_SUFFIXES = (".c", ".cc", ".cpp", ".cxx")
+HEADER_SUFFIXES = (".h", ".hh", ".hpp", ".hxx")
+
+# Obfuscated units are stored by fingerprint, so unchanged units are reused
+# across resubmissions (and across projects sharing identical sources).
+OBJECTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "builds", "objects")
+OBJECTS_MAX_AGE = 7 * 24 * 3600
+# The real toolchain runs as a subprocess per unit, so threads are enough to
+# keep every core busy from inside one job worker.
+UNIT_WORKERS = int(os.environ.get("OBFUSCATOR_UNIT_WORKERS", os.cpu_count() or 2))
+
+INCLUDE_RE = re.compile(r'^[ \t]*#[ \t]*include[ \t]*"([^"]+)"', re.MULTILINE)
+
+
+def is_archive(path) -> bool:
+    return path.lower().endswith(ARCHIVE_SUFFIXES)
+
+
+def archive_stem(filename) -> str:
+    lower = filename.lower()
+    for suffix in sorted(ARCHIVE_SUFFIXES, key=len, reverse=True):
+        if lower.endswith(suffix):
+            return filename[:-len(suffix)]
+    return os.path.splitext(filename)[0]
+
+
+# --- Extraction ------------------------------------------------------------
+def _inside(root, member) -> bool:
+    target = os.path.realpath(os.path.join(root, member))
+    return os.path.commonpath([os.path.realpath(root), target]) == os.path.realpath(root)
+
+
+def extract_archive(archive_path, dest):
+    """Extract regular files only, refusing members that escape dest."""
+    os.makedirs(dest, exist_ok=True)
+    if archive_path.lower().endswith(".zip"):
+        with zipfile.ZipFile(archive_path) as zf:
+            for info in zf.infolist():
+                if info.is_dir() or not _inside(dest, info.filename):
+                    continue
+                target = os.path.join(dest, info.filename)
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                with zf.open(info) as src, open(target, "wb") as out:
+                    shutil.copyfileobj(src, out, CHUNK_SIZE)
+    else:
+        with tarfile.open(archive_path) as tf:
+            for member in tf:
+                if not member.isfile() or not _inside(dest, member.name):
+                    continue
+                target = os.path.join(dest, member.name)
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                with tf.extractfile(member) as src, open(target, "wb") as out:
+                    shutil.copyfileobj(src, out, CHUNK_SIZE)
+
+
+# --- Dependency scan -------------------------------------------------------
+def scan_project(root):
+    """
+    Return (units, includes): every translation unit path relative to root,
+    and for each source/header the project files its #include "..." lines
+    resolve to. Includes are looked up next to the including file, then at
+    the project root, then in any top-level include/ directory.
+    """
+    files = []
+    for dirpath, _, filenames in os.walk(root):
+        for name in filenames:
+            if name.lower().endswith(UNIT_SUFFIXES + HEADER_SUFFIXES):
+                files.append(os.path.relpath(os.path.join(dirpath, name), root).replace(os.sep, "/"))
+    known = set(files)
+    search = [""] + (["include/"] if any(f.startswith("include/") for f in files) else [])
+
+    includes = {}
+    for rel in files:
+        with open(os.path.join(root, rel), encoding="utf-8", errors="replace") as f:
+            names = INCLUDE_RE.findall(f.read())
+        here = os.path.dirname(rel)
+        resolved = []
+        for name in names:
+            for base in [here + "/" if here else ""] + search:
+                candidate = os.path.normpath(base + name).replace(os.sep, "/")
+                if candidate in known:
+                    resolved.append(candidate)
+                    break
+        includes[rel] = resolved
+
+    units = sorted(f for f in files if f.lower().endswith(UNIT_SUFFIXES))
+    return units, includes
+
+
+def header_closure(unit, includes):
+    """All project headers reachable from unit through #include."""
+    seen, stack = set(), list(includes.get(unit, ()))
+    while stack:
+        header = stack.pop()
+        if header not in seen:
+            seen.add(header)
+            stack.extend(includes.get(header, ()))
+    return sorted(seen)
+
+
+def _digest(path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+# --- Build -----------------------------------------------------------------
+def build_project(archive_path, output_path, params, progress=None, objects_dir=OBJECTS_DIR):
+    """
+    Obfuscate every translation unit of an archived project in parallel and
+    pack the results into a zip at output_path. A unit whose source, included
+    headers and normalized params match an earlier build is reused instead of
+    reprocessed. The report has the usual aggregate fields plus per-unit
+    timings and the speedup over a full rebuild.
+    """
+    wall_start = time.perf_counter()
+    src_root = os.path.join(os.path.dirname(output_path), "src")
+    with stage("extract"):
+        extract_archive(archive_path, src_root)
+    with stage("scan"):
+        units, includes = scan_project(src_root)
+        digests = {rel: _digest(os.path.join(src_root, rel)) for rel in includes}
+    os.makedirs(objects_dir, exist_ok=True)
+
+    params_key = json.dumps(normalize_params(params), sort_keys=True, default=str)
+    obj_ext = ".obj" if params.get("platform") == "Windows" else ".o"
+
+    def fingerprint(unit):
+        h = hashlib.sha256(params_key.encode())
+        for rel in [unit] + header_closure(unit, includes):
+            h.update(f"{rel}\0{digests[rel]}\0".encode())
+        return h.hexdigest()
+
+    def build_unit(unit):
+        entry = os.path.join(objects_dir, fingerprint(unit))
+        meta_path = os.path.join(entry, "meta.json")
+        if os.path.exists(meta_path):
+            os.utime(entry)  # keeps reused objects young for the reaper
+            with open(meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+            return unit, entry, meta, "reused", 0.0
+
+        start = time.perf_counter()
+        tmp = f"{entry}.tmp-{uuid.uuid4().hex}"
+        os.makedirs(tmp)
+        report, _ = simulate_obfuscation(os.path.join(src_root, unit), os.path.join(tmp, "object"), params)
+        seconds = time.perf_counter() - start
+        meta = {"seconds": seconds, "report": report}
+        with open(os.path.join(tmp, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f, default=str)
+        try:
+            os.rename(tmp, entry)
+        except OSError:
+            shutil.rmtree(tmp, ignore_errors=True)  # built concurrently elsewhere
+        return unit, entry, meta, "rebuilt", seconds
+
+    # Units are submitted only as workers free up, so a cancel raised by
+    # progress() stops the build after the units already running
+    built = {}
+    with stage("units"), ThreadPoolExecutor(UNIT_WORKERS) as pool:
+        todo, pending = iter(units), set()
+        while True:
+            pending.update(pool.submit(build_unit, unit) for unit in itertools.islice(todo, UNIT_WORKERS - len(pending)))
+            if not pending:
+                break
+            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                result = future.result()
+                built[result[0]] = result
+                if progress:
+                    progress(len(built) / max(len(units), 1) * 0.9, f"unit {len(built)}/{len(units)}")
+    results = [built[unit] for unit in units]
+
+    with stage("pack"), zipfile.ZipFile(output_path, "w", zipfile.ZIP_DEFLATED) as zf:
+        for unit, entry, _, _, _ in results:
+            zf.write(os.path.join(entry, "object"), os.path.splitext(unit)[0] + obj_ext)
+
+    wall = time.perf_counter() - wall_start
+    unit_rows = [
+        {"unit": unit, "status": status, "seconds": seconds, "full_build_seconds": meta["seconds"]}
+        for unit, _, meta, status, seconds in results
+    ]
+    full_build = sum(row["full_build_seconds"] for row in unit_rows)
+    unit_reports = [meta["report"] for _, _, meta, _, _ in results]
+    rebuilt = sum(1 for row in unit_rows if row["status"] == "rebuilt")
+
+    report = {
+        "input_parameters": params,
+        "output_file_size": os.path.getsize(output_path),
+        "method_of_obfuscation": f"Simulated Obfuscation (Level: {params.get('obfuscation_level')}, "
+                                 f"{len(units)} translation units)",
+        "bogus_code_generated": "Approximately 50 lines per unit (simulated)",
+        "cycles_completed": max((r["cycles_completed"] for r in unit_reports), default=0),
+        "string_obfuscations": sum(r["string_obfuscations"] for r in unit_reports),
+        "fake_loops_inserted": sum(r["fake_loops_inserted"] for r in unit_reports),
+        # Objects built before source analysis existed have no metrics
+        "source_metrics": {
+            field: sum(r.get("source_metrics", {}).get(field, 0) for r in unit_reports)
+            for field in ("lines", "string_literals", "loops", "functions")
+        },
+        "units": unit_rows,
+        "units_rebuilt": rebuilt,
+        "units_reused": len(unit_rows) - rebuilt,
+        "wall_seconds": wall,
+        # Serial cost of rebuilding every unit, from each object's recorded build time
+        "full_rebuild_seconds": full_build,
+        "speedup": full_build / wall if wall > 0 else 0.0,
+    }
+    return report, output_path
@@ -0,0 +1,152 @@
+import os
+import json
+import time
+import uuid
+import shutil
+import hashlib
+import threading
+
+from obfuscator import CHUNK_SIZE
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache")
+MAX_BYTES = int(os.environ.get("OBFUSCATOR_CACHE_BYTES", 1 << 30))
+
+ARTIFACT = "artifact"
+REPORT = "report.json"
+META = "meta.json"
+
+
+def file_digest(path, chunk_size=CHUNK_SIZE) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def normalize_params(params) -> dict:
+    """
+    The parts of a job's params that affect its output. The original filename
+    and the raw custom-params text (whitespace, comments) do not.
+    """
+    return {
+        "platform": params.get("platform"),
+        "obfuscation_level": params.get("obfuscation_level"),
+        "custom_params": dict(sorted((params.get("custom_params") or {}).items())),
+    }
+
+
+def cache_key(input_path, params) -> str:
+    h = hashlib.sha256()
+    h.update(file_digest(input_path).encode())
+    h.update(json.dumps(normalize_params(params), sort_keys=True, default=str).encode())
+    return h.hexdigest()
+
+
+class ResultCache:
+    """
+    On-disk cache of obfuscation results keyed by cache_key(). Each entry is a
+    directory holding the output artifact, the report and a meta file with
+    its hit and miss counts. Entries are evicted least recently used first once the
+    total size exceeds max_bytes.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, max_bytes=MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _entry(self, key):
+        return os.path.join(self.cache_dir, key)
+
+    def _read_meta(self, entry):
+        with open(os.path.join(entry, META), encoding="utf-8") as f:
+            return json.load(f)
+
+    def _write_meta(self, entry, meta):
+        tmp = os.path.join(entry, META + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp, os.path.join(entry, META))
+
+    def get(self, key, output_path):
+        """
+        On a hit, copy the cached artifact to output_path and return the
+        cached report; return None on a miss. (A copy, not a link, so later
+        writes to output_path cannot corrupt the entry.)
+        """
+        entry = self._entry(key)
+        with self._lock:
+            try:
+                meta = self._read_meta(entry)
+                with open(os.path.join(entry, REPORT), encoding="utf-8") as f:
+                    report = json.load(f)
+                shutil.copyfile(os.path.join(entry, ARTIFACT), output_path)
+            except (OSError, ValueError):
+                self.misses += 1
+                return None
+            self.hits += 1
+            meta["hits"] += 1
+            meta["last_used"] = time.time()
+            self._write_meta(entry, meta)
+        return report
+
+    def put(self, key, output_path, report):
+        entry = self._entry(key)
+        tmp = os.path.join(self.cache_dir, f".tmp-{uuid.uuid4().hex}")
+        os.makedirs(tmp)
+        try:
+            shutil.copyfile(output_path, os.path.join(tmp, ARTIFACT))
+            with open(os.path.join(tmp, REPORT), "w", encoding="utf-8") as f:
+                json.dump(report, f, default=str)
+            size = os.path.getsize(os.path.join(tmp, ARTIFACT)) + os.path.getsize(os.path.join(tmp, REPORT))
+            now = time.time()
+            self._write_meta(tmp, {"key": key, "size": size, "hits": 0, "misses": 1,
+                                   "created": now, "last_used": now})
+            with self._lock:
+                if os.path.exists(entry):
+                    # Another run of the same request finished first
+                    shutil.rmtree(tmp)
+                    meta = self._read_meta(entry)
+                    meta["misses"] += 1
+                    self._write_meta(entry, meta)
+                else:
+                    os.rename(tmp, entry)
+                self._evict()
+        except BaseException:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+
+    def entries(self):
+        """Meta dicts of every entry, most recently used first."""
+        out = []
+        for name in os.listdir(self.cache_dir):
+            if name.startswith("."):
+                continue
+            try:
+                out.append(self._read_meta(self._entry(name)))
+            except (OSError, ValueError):
+                continue
+        return sorted(out, key=lambda m: m["last_used"], reverse=True)
+
+    def stats(self):
+        entries = self.entries()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(entries),
+            "bytes": sum(m["size"] for m in entries),
+        }
+
+    def _evict(self):
+        entries = self.entries()
+        total = sum(m["size"] for m in entries)
+        while entries and total > self.max_bytes:
+            victim = entries.pop()
+            shutil.rmtree(self._entry(victim["key"]), ignore_errors=True)
+            total -= victim["size"]
@@ -0,0 +1,46 @@
+import random
+
+import domain_reputation
+
+
+def expected_verdict(listed, domain):
+    labels = domain.lower().split(".")
+    for i in range(len(labels) - 1):
+        verdict = listed.get(".".join(labels[i:]))
+        if verdict is not None:
+            return verdict
+    return None
+
+
+def test_lookup_matches_dict(tmp_path):
+    rng = random.Random(2)
+    names = ["".join(rng.choice("abc") for _ in range(rng.randint(1, 3))) for _ in range(60)]
+    listed = {}
+    for _ in range(80):
+        domain = ".".join(rng.sample(names, rng.randint(1, 3))) + ".com"
+        listed[domain] = rng.choice(["allow", "deny"])
+    list_path = tmp_path / "list.txt"
+    list_path.write_text("# comment\n\n" + "".join(f"{d} {v}\n" for d, v in listed.items()))
+
+    store = domain_reputation.open_reputation(str(list_path))
+    try:
+        assert store.count == len(listed)
+        probes = list(listed) + [".".join(rng.sample(names, rng.randint(1, 4))) + ".com" for _ in range(300)]
+        for domain in probes:
+            assert store.lookup(domain.upper() + ".") == expected_verdict(listed, domain), domain
+    finally:
+        store.close()
+
+
+def test_most_specific_entry_wins(tmp_path):
+    list_path = tmp_path / "list.txt"
+    list_path.write_text("example.com deny\nmail.example.com allow\nbücher.de\n")
+    store = domain_reputation.open_reputation(str(list_path))
+    try:
+        assert store.lookup("a.mail.example.com") == "allow"
+        assert store.lookup("www.example.com") == "deny"
+        assert store.lookup("notexample.com") is None
+        assert store.lookup("com") is None
+        assert store.lookup("shop.BÜCHER.de") == "deny"
+    finally:
+        store.close()
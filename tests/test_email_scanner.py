@@ -0,0 +1,87 @@
+import archive_scan
+import email_scanner
+
+
+def indicator_types(result):
+    return [indicator["type"] for indicator in result["indicators"]]
+
+
+# Pasted text whose first line looks like a header must still be scanned
+def test_pasted_text_with_header_like_first_line():
+    result = email_scanner.analyze_message("URGENT: act now or lose your account")
+    assert "Urgency/Threat" in indicator_types(result)
+
+
+def test_pasted_bare_url_after_from_line():
+    result = email_scanner.analyze_message("From: a@gmail.com\nhttps://paypal-login.xyz/verify")
+    assert [link["url"] for link in result["links"]] == ["https://paypal-login.xyz/verify"]
+    assert "Suspicious Link" in indicator_types(result)
+
+
+ATTACHMENT_EML = (
+    b"From: alice@gmail.com\r\n"
+    b"Subject: Notes\r\n"
+    b"MIME-Version: 1.0\r\n"
+    b'Content-Type: multipart/mixed; boundary="b1"\r\n'
+    b"\r\n"
+    b"--b1\r\n"
+    b"Content-Type: text/plain\r\n"
+    b"\r\n"
+    b"See the attached notes.\r\n"
+    b"--b1\r\n"
+    b"Content-Type: text/plain\r\n"
+    b'Content-Disposition: attachment; filename="notes.txt"\r\n'
+    b"\r\n"
+    b"URGENT act now http://paypa1-login.com/reset\r\n"
+    b"--b1--\r\n"
+)
+
+
+# Files are messages, not pasted text: both scan paths must agree on them
+def test_file_scan_matches_archive_scan(tmp_path, monkeypatch):
+    monkeypatch.setattr(email_scanner, "jitter", lambda content, seed=None: 0)
+    (tmp_path / "a.eml").write_bytes(ATTACHMENT_EML)
+    (tmp_path / "b.eml").write_bytes(b"From: x@bank-alerts.net\nSubject: urgent\n\nhttp://paypa1.com/login\n")
+    scanned = email_scanner.scan_messages(email_scanner.iter_messages(str(tmp_path)))["results"]
+    archived = archive_scan._scan_task(archive_scan.plan_tasks(str(tmp_path))[1].__next__())
+
+    assert [r["id"] for r in scanned] == [r["id"] for r in archived]
+    for mine, theirs in zip(scanned, archived):
+        assert mine["score"] == theirs["score"]
+        assert [i["type"] for i in mine["indicators"]] == theirs["indicators"]
+        assert [link["url"] for link in mine["links"] if link["is_phishy"]] == theirs["phishy_links"]
+    assert scanned[0]["indicators"] == []
+
+
+MBOX = (
+    b"From alice@gmail.com Mon Jan  1 00:00:00 2024\n"
+    b"From: alice@gmail.com\nSubject: hi\n\n>From the desk of Alice\n\n"
+    b"From x@bank-alerts.net Mon Jan  1 00:00:00 2024\n"
+    b"From: x@bank-alerts.net\nSubject: urgent\n\nverify now http://paypa1.com/login\n\n"
+    b"From y@paypal.com Mon Jan  1 00:00:00 2024\n"
+    b"From: y@paypal.com\nSubject: receipt\n\nThanks\n"
+)
+
+
+def test_mbox_offsets_do_not_depend_on_chunk_size(tmp_path):
+    path = tmp_path / "box.mbox"
+    path.write_bytes(MBOX)
+    expected = [i for i in range(len(MBOX)) if MBOX.startswith(b"From ", i) and (i == 0 or MBOX[i - 1] == 10)]
+    for chunk_size in (1, 2, 5, 6, 7, 64):
+        assert list(archive_scan.mbox_offsets(str(path), chunk_size)) == expected
+
+
+def test_mbox_file_scan_matches_archive_scan(tmp_path, monkeypatch):
+    monkeypatch.setattr(email_scanner, "jitter", lambda content, seed=None: 0)
+    path = tmp_path / "box.mbox"
+    path.write_bytes(MBOX)
+    scanned = email_scanner.scan_messages(email_scanner.iter_messages(str(path)))["results"]
+    archived = [r for task in archive_scan.plan_tasks(str(path), batch_size=2)[1]
+                for r in archive_scan._scan_task(task)]
+
+    assert len(scanned) == len(archived) == 3
+    for mine, theirs in zip(scanned, archived):
+        assert mine["id"] == theirs["id"]
+        assert mine["score"] == theirs["score"]
+        assert [i["type"] for i in mine["indicators"]] == theirs["indicators"]
+        assert [link["url"] for link in mine["links"] if link["is_phishy"]] == theirs["phishy_links"]
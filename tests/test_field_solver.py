@@ -0,0 +1,27 @@
+import numpy as np
+
+import field_solver
+
+
+def test_octree_at_theta_zero_matches_direct_sum():
+    charges = field_solver.cloud_charges(300, seed=3)
+    grid = field_solver.make_grid(9)
+    direct = field_solver.superposed_field(charges, *grid, chunk_elements=1000)
+    tree = field_solver.Octree(charges).field(*grid, theta=0.0)
+    for a, b in zip(direct, tree):
+        assert np.allclose(a, b, rtol=1e-9, atol=1e-9 * np.abs(a).max())
+
+
+def test_octree_approximation_is_close():
+    charges = field_solver.cloud_charges(2000, seed=4)
+    grid = field_solver.make_grid(8)
+    direct = np.stack(field_solver.superposed_field(charges, *grid))
+    tree = np.stack(field_solver.Octree(charges).field(*grid))
+    err = np.linalg.norm(tree - direct, axis=0) / np.maximum(np.linalg.norm(direct, axis=0), 1e-12)
+    assert np.median(err) < 1e-2
+
+
+def test_arrow_count_matches_compute_field():
+    for n in (8, 15):
+        frame = field_solver.compute_field(field_solver.DIPOLE, 1.0, n, 0.0)
+        assert len(frame["x"]) == field_solver.arrow_count(n)
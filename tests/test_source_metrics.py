@@ -0,0 +1,32 @@
+import random
+
+from source_metrics import analyze_source
+
+PIECES = [
+    "int main(void) {\n", "void f(int a)\n{\n", "}\n", "for (i = 0; i < n; i++) {\n", "while (x) x--;\n",
+    "do { y++; } while (y);\n", '"a \\" b";\n', "'\"';\n", "// for ( while\n", "/* for { */\n",
+    "/* open\n", "*/\n", 'R"x(for")x";\n', 'R"(\n', ')";\n', "#define F(x) { x }\n",
+    "#if 1 \\\n  for\n", "x = 1; \\\n", "struct s { int a; };\n", "\n", "\r\n",
+]
+
+
+def test_small_chunks_match_whole_file(tmp_path):
+    rng = random.Random(5)
+    path = tmp_path / "a.c"
+    for _ in range(150):
+        source = "".join(rng.choice(PIECES) for _ in range(rng.randint(0, 30)))
+        if rng.random() < 0.3:
+            source = source.rstrip("\n")
+        path.write_text(source, newline="")
+        whole = analyze_source(str(path), chunk_size=1 << 20)
+        for chunk_size in (1, 2, 3, 7, 16):
+            assert analyze_source(str(path), chunk_size=chunk_size) == whole, (chunk_size, source)
+
+
+def test_comments_strings_and_directives_are_skipped(tmp_path):
+    path = tmp_path / "b.c"
+    path.write_text(
+        "#include <x>\n// for\nint main(void) {\n  for (;;) { }\n  while (1) {}\n"
+        '  puts("for");\n  /* while */\n}\nstatic int g(int a) { return a; }'
+    )
+    assert analyze_source(str(path)) == {"lines": 9, "string_literals": 1, "loops": 2, "functions": 2}
@@ -0,0 +1,40 @@
+import random
+
+from url_index import KeywordIndex
+
+
+def naive_find(terms, text):
+    folded = text.lower()
+    matches = []
+    for term in {t.lower() for t in terms if t}:
+        i = folded.find(term)
+        while i != -1:
+            matches.append((term, i))
+            i = folded.find(term, i + 1)
+    return sorted(matches)
+
+
+def test_find_matches_naive_search():
+    rng = random.Random(1)
+    for _ in range(200):
+        terms = ["".join(rng.choice("abAB") for _ in range(rng.randint(1, 4))) for _ in range(rng.randint(1, 6))]
+        text = "".join(rng.choice("aAbB.") for _ in range(rng.randint(0, 40)))
+        assert sorted(KeywordIndex(terms).find(text)) == naive_find(terms, text)
+
+
+def test_overlapping_and_nested_terms():
+    index = KeywordIndex(["pay", "paypal", "pal", "al"])
+    assert sorted(index.find("PayPal")) == [("al", 4), ("pal", 3), ("pay", 0), ("paypal", 0)]
+
+
+def test_offsets_are_into_the_original_text():
+    # "İ" lowercases to two characters; offsets must still index the input
+    text = "http://İ.com/login"
+    assert KeywordIndex(["login"]).find(text) == [("login", 13)]
+    assert text[13:18] == "login"
+
+
+def test_len_counts_distinct_terms():
+    index = KeywordIndex(["Bank", "bank", "", "login"])
+    assert len(index) == 2
+    assert not KeywordIndex()
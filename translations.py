@@ -0,0 +1,35 @@
+import os
+import json
+from functools import lru_cache
+
+# UI strings live in one JSON bundle per language under locales/. A bundle is
+# read the first time its language is used and then shared by every session
+# in the process, so adding a language costs nothing until someone picks it.
+LOCALES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "locales")
+DEFAULT_LANG = "en"
+
+# Language picker labels -> bundle names
+LANG_MAP = {
+    "English (अंग्रेज़ी)": "en",
+    "Hindi (हिन्दी)": "hi",
+    "Telugu (తెలుగు)": "te",
+    "Bengali (বাংলা)": "bn",
+    "Urdu (اردو)": "ur",
+}
+
+
+@lru_cache(maxsize=None)
+def load_bundle(lang_code) -> dict:
+    """Strings of one language; keys it lacks fall back to English."""
+    with open(os.path.join(LOCALES_DIR, f"{lang_code}.json"), encoding="utf-8") as f:
+        bundle = json.load(f)
+    if lang_code != DEFAULT_LANG:
+        bundle = {**load_bundle(DEFAULT_LANG), **bundle}
+    return bundle
+
+
+def get_translation(lang_code):
+    """Strings for lang_code, falling back to English for unknown languages."""
+    if lang_code not in LANG_MAP.values():
+        lang_code = DEFAULT_LANG
+    return load_bundle(lang_code)
@@ -0,0 +1,105 @@
+import os
+import time
+import uuid
+import shutil
+import threading
+
+from obfuscator import DOWNLOADS_DIR
+
+# Per-job workspaces live next to static/, on the same filesystem, so
+# publish_download can hard-link an output instead of copying it. Pointing
+# OBFUSCATOR_WORKSPACE_ROOT at tmpfs (/dev/shm/...) saves the disk writes but
+# keeps every upload in RAM and makes each download a full copy.
+LOCAL_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "workspaces")
+
+MAX_AGE = int(os.environ.get("OBFUSCATOR_WORKSPACE_MAX_AGE", 3600))
+MAX_BYTES = int(os.environ.get("OBFUSCATOR_WORKSPACE_BYTES", 2 << 30))
+REAP_INTERVAL = 60
+
+
+def default_root() -> str:
+    return os.environ.get("OBFUSCATOR_WORKSPACE_ROOT") or LOCAL_ROOT
+
+
+def create_workspace(root=None) -> str:
+    """Make a fresh, uniquely named directory for one job's files."""
+    path = os.path.join(root or default_root(), uuid.uuid4().hex)
+    os.makedirs(path)
+    return path
+
+
+def _tree_size(path) -> int:
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        for name in filenames:
+            try:
+                total += os.lstat(os.path.join(dirpath, name)).st_size
+            except OSError:
+                pass
+    return total
+
+
+class Reaper:
+    """
+    Background thread that deletes job directories under the given roots once
+    they are older than max_age, then the oldest ones until each root is
+    back under max_bytes. keep() returns paths that are still in use;
+    on_reap(), if given, runs after every pass.
+    """
+
+    def __init__(self, roots, max_age=MAX_AGE, max_bytes=MAX_BYTES, interval=REAP_INTERVAL, keep=None,
+                 on_reap=None):
+        self.roots = list(roots)
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        self.interval = interval
+        self.keep = keep or (lambda: ())
+        self.on_reap = on_reap
+        self.removed = 0
+        self._stop = threading.Event()
+
+    def start(self):
+        threading.Thread(target=self._loop, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            self.reap()
+
+    def reap(self):
+        keep = {os.path.abspath(p) for p in self.keep()}
+        now = time.time()
+        for root in self.roots:
+            try:
+                names = os.listdir(root)
+            except FileNotFoundError:
+                continue
+            dirs = []
+            for name in names:
+                path = os.path.join(root, name)
+                if not os.path.isdir(path) or os.path.abspath(path) in keep:
+                    continue
+                try:
+                    dirs.append((os.path.getmtime(path), path))
+                except OSError:
+                    continue
+            dirs.sort()
+
+            sizes = {path: _tree_size(path) for _, path in dirs}
+            total = sum(sizes.values())
+            for mtime, path in dirs:
+                if now - mtime <= self.max_age and total <= self.max_bytes:
+                    break
+                shutil.rmtree(path, ignore_errors=True)
+                total -= sizes[path]
+                self.removed += 1
+        if self.on_reap:
+            self.on_reap()
+
+
+def start_reaper(keep=None, **kwargs):
+    """Reap job workspaces and published downloads in the background."""
+    return Reaper([default_root(), DOWNLOADS_DIR], keep=keep, **kwargs).start()